@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+
+class TTLCache:
+    """Thread-safe LRU where every entry carries its own expiry time."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"size": size, "hits": self.hits, "misses": self.misses}
+
+
+class TokenCache:
+    """Verified JWT payloads, kept until the token's own exp.
+
+    Keyed by a SHA-256 of the token so raw tokens are never held in memory
+    longer than the request. Tokens without exp are verified every time.
+    """
+
+    def __init__(self, secret, maxsize=10000):
+        self.secret = secret
+        self.cache = TTLCache(maxsize)
+
+    def verify(self, token):
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+
+        payload = jwt.decode(token, self.secret, algorithms=["HS256"])
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            self.cache.put(key, payload, exp)
+        return payload
+
+
+class UserSnapshotCache:
+    """Short-lived per-wallet copy of the user's consent fields.
+
+    Writes in this process invalidate their wallet; other workers may serve
+    a snapshot up to `ttl` seconds old.
+    """
+
+    def __init__(self, users, ttl=10, maxsize=10000):
+        self.users = users
+        self.ttl = ttl
+        self.cache = TTLCache(maxsize)
+        self._missing = object()
+
+    def get(self, wallet):
+        snapshot = self.cache.get(wallet, self._missing)
+        if snapshot is not self._missing:
+            return snapshot
+
+        user = self.users.find_one(
+            {"wallet": wallet},
+            {"_id": 0, "consents": 1, "consent_given_at": 1}
+        )
+        snapshot = None
+        if user is not None:
+            snapshot = {
+                "wallet": wallet,
+                "consents": user.get("consents", []),
+                "consent_given_at": user.get("consent_given_at", {}),
+            }
+        self.cache.put(wallet, snapshot, time.time() + self.ttl)
+        return snapshot
+
+    def invalidate(self, wallet):
+        self.cache.invalidate(wallet)
@@ -0,0 +1,70 @@
+"""Commission throughput: scalar float function vs lamport batch path.
+
+    python benchmarks/bench_commission.py --prices 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commission import (  # noqa: E402
+    commission_lamports,
+    commission_lamports_batch,
+    sol_to_lamports,
+)
+
+
+def legacy_commission(price):
+    """calculate_sol_commission before the lamport rewrite."""
+    if price < 0.01:
+        return max(price * 0.10, 0.0001)
+    elif price < 0.1:
+        return price * 0.05
+    elif price < 1:
+        return price * 0.01
+    elif price <= 100:
+        return price * 0.0025
+    else:
+        return 0.25
+
+
+def timed(label, func, count, repeat):
+    best = min(_once(func) for _ in range(repeat))
+    print(f"{label:<22} {best * 1000:9.2f} ms   {count / best / 1e6:8.2f} M prices/s")
+    return best
+
+
+def _once(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    prices = [round(10 ** rng.uniform(-3, 4), 4) for _ in range(args.prices)]
+    lamports = [sol_to_lamports(p) for p in prices]
+
+    base = timed("scalar float", lambda: [legacy_commission(p) for p in prices], args.prices, args.repeat)
+    timed("scalar lamports", lambda: [commission_lamports(p) for p in lamports], args.prices, args.repeat)
+    batch = timed("batch lamports", lambda: commission_lamports_batch(lamports), args.prices, args.repeat)
+    timed("sol_to_lamports", lambda: [sol_to_lamports(p) for p in prices], args.prices, args.repeat)
+    print(f"batch vs scalar float  {base / batch:8.1f}x")
+
+    drift = sum(
+        1 for p, l in zip(prices, lamports)
+        if sol_to_lamports(legacy_commission(p)) != commission_lamports(l)
+    )
+    print(f"float results off by >= 1 lamport: {drift} of {args.prices}")
+
+
+if __name__ == "__main__":
+    main()
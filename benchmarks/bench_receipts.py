@@ -0,0 +1,149 @@
+"""Receipts per second: the original per-request FPDF build vs ReceiptRenderer.
+
+    python benchmarks/bench_receipts.py --receipts 200 --products 10 --latency 0.05
+
+The product image is a generated full-size JPEG served by a fake fetch that
+sleeps `--latency` seconds, standing in for the S3 download.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import datetime
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from receipt_renderer import ImageCache, ReceiptRenderer  # noqa: E402
+
+
+def make_image(width=1600, height=1200):
+    img = Image.new("RGB", (width, height))
+    pixels = img.load()
+    for x in range(0, width, 4):
+        for y in range(0, height, 4):
+            pixels[x, y] = (x % 256, y % 256, (x * y) % 256)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def legacy_receipt(data, fetch):
+    """The send_receipt layout as it was before ReceiptRenderer."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_fill_color(0, 0, 0)
+    pdf.rect(0, 0, pdf.w, pdf.h, "F")
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    CYAN = (0, 255, 255)
+    WHITE = (255, 255, 255)
+
+    pdf.set_draw_color(*CYAN)
+    pdf.set_text_color(*CYAN)
+    pdf.set_font("Helvetica", style="B", size=18)
+    pdf.cell(0, 12, "Electronic Payment Receipt", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(6)
+    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+    pdf.ln(8)
+
+    img_buffer = io.BytesIO(fetch(data["image"]))
+    x_pos = (pdf.w - 100) / 2
+    y_pos = pdf.get_y()
+    pdf.image(img_buffer, x=x_pos, y=y_pos, w=100, h=60)
+    pdf.rect(x_pos, y_pos, 100, 60)
+    pdf.ln(66)
+
+    page_width = pdf.w - 2 * pdf.l_margin
+
+    def add_row(label, value):
+        pdf.set_text_color(*CYAN)
+        pdf.set_font("Helvetica", style="B", size=12)
+        pdf.cell(55, 8, label, new_x=XPos.RIGHT, new_y=YPos.TOP)
+        pdf.set_text_color(*WHITE)
+        pdf.set_font("Helvetica", size=12)
+        pdf.multi_cell(page_width - 55, 8, str(value))
+        pdf.ln(2)
+
+    add_row("Receipt Date:", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"))
+    add_row("Product:", data["title"])
+    add_row("Amount Paid:", f"{data['price']} {data['currency']}")
+    add_row("Buyer Wallet:", data["buyer_wallet"])
+    add_row("Seller Wallet:", data["sellerWallet"])
+    add_row("Transaction Hash:", data["tx_hash"])
+    add_row("Platform Commission:", f"{data['commission']} {data['currency']} (paid by seller)")
+
+    pdf.ln(4)
+    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+    pdf.ln(6)
+    pdf.set_text_color(*WHITE)
+    pdf.set_font("Helvetica", size=11)
+    pdf.multi_cell(0, 7, "This document is provided for informational purposes only and serves as a record of a completed blockchain transaction. It does not constitute a legal agreement, contract, or proof of consent between the parties.")
+    pdf.ln(3)
+    pdf.set_font("Helvetica", style="I", size=10)
+    pdf.multi_cell(0, 6, "User acknowledgements and consent selections are collected separately via the platform interface at the time of payment and may be stored in platform systems for audit or compliance purposes.")
+    pdf.ln(4)
+    pdf.set_font("Helvetica", size=10)
+    pdf.multi_cell(0, 6, "Cryptocurrency transactions are irreversible and may involve technical or market risks. Users are responsible for reviewing all applicable platform documentation prior to initiating a transaction.")
+    pdf.ln(8)
+    pdf.set_text_color(*CYAN)
+    pdf.set_font("Helvetica", style="I", size=9)
+    pdf.cell(0, 6, "Powered by Neonflick-bps - Blockchain transaction record", align="C")
+
+    out = io.BytesIO()
+    pdf.output(out)
+    return out.getvalue()
+
+
+def receipt_data(i, products):
+    return {
+        "product_id": f"p{i % products}",
+        "title": f"Product {i % products}",
+        "price": 1.25,
+        "currency": "SOL",
+        "commission": 0.003125,
+        "sellerWallet": "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T",
+        "buyer_wallet": "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin",
+        "tx_hash": "5" * 88,
+        "image": f"https://bucket.s3.region.amazonaws.com/products/{i % products}.jpg",
+        "email": "buyer@example.com",
+    }
+
+
+def run(label, render, receipts, products):
+    started = time.perf_counter()
+    size = 0
+    for i in range(receipts):
+        size += len(render(receipt_data(i, products)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {receipts / elapsed:8.1f} receipts/s   "
+          f"{elapsed / receipts * 1000:7.2f} ms/receipt   {size / receipts / 1024:6.1f} KiB/pdf")
+    return receipts / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--products", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="simulated image download time in seconds")
+    args = parser.parse_args()
+
+    image = make_image()
+
+    def fetch(url):
+        time.sleep(args.latency)
+        return image
+
+    before = run("before", lambda d: legacy_receipt(d, fetch), args.receipts, args.products)
+    renderer = ReceiptRenderer(ImageCache(fetch))
+    after = run("after", renderer.render, args.receipts, args.products)
+    print(f"speedup    {after / before:8.1f}x   image cache {renderer.image_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""Per-route throughput, latency and allocation benchmark for app.py.
+
+    python benchmarks/bench_routes.py run --requests 500 --concurrency 16
+    python benchmarks/bench_routes.py run --mongo-uri mongodb://localhost:27017
+    python benchmarks/bench_routes.py compare results/base.json results/head.json
+
+The app runs in-process behind Flask's test client, against stand-ins:
+
+- Mongo: mongomock, or a real mongod with --mongo-uri (needed for exact
+  numbers, mongomock has no $type so /products formats dates without it)
+- S3: an in-memory fake, or any S3 API (MinIO, moto server) via
+  --s3-endpoint, whose bucket must already exist
+- Solana RPC: benchmarks/solana_stub.py on a local port
+- Mailjet and the receipt image download: in-process fakes
+
+Each route is driven by --concurrency threads for --requests requests,
+then replayed single-threaded under tracemalloc for allocations. Results
+go to benchmarks/results/<commit>.json; compare exits 1 when a route
+got slower, lost throughput or allocates more beyond --threshold.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import solana_stub  # noqa: E402
+
+ROUTES = [
+    "auth_wallet",
+    "products",
+    "create_product",
+    "create_presigned",
+    "pay",
+    "prepare_sol",
+    "transaction",
+    "delete_products",
+    "send_receipt",
+]
+
+SELLER = "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T"
+BUYER = "So11111111111111111111111111111111111111112"
+PLATFORM = "11111111111111111111111111111111"
+
+
+# ---------- stand-ins ----------
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        data = fileobj.read()
+        with self._lock:
+            self.objects[key] = (len(data), (ExtraArgs or {}).get("ContentType"))
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600):
+        return {"url": "fake-s3://bench", "fields": {"key": Key, **(Fields or {})}}
+
+    def post(self, fields, data):
+        """What S3 does with a browser's presigned POST."""
+        with self._lock:
+            self.objects[fields["key"]] = (len(data), fields.get("Content-Type"))
+
+    def delete_objects(self, Bucket, Delete):
+        with self._lock:
+            for obj in Delete["Objects"]:
+                self.objects.pop(obj["Key"], None)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        with self._lock:
+            if Key not in self.objects:
+                from botocore.exceptions import ClientError
+                raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+            size, content_type = self.objects[Key]
+            return {"ContentLength": size, "ContentType": content_type}
+
+
+class FakeMailjet:
+    class _Result:
+        status_code = 200
+
+        def json(self):
+            return {"Messages": [{"Status": "success"}]}
+
+    def send(self, data):
+        return FakeMailjet._Result()
+
+
+def make_image(width=1200, height=900, fmt="PNG"):
+    img = Image.new("RGB", (width, height))
+    pixels = img.load()
+    for x in range(0, width, 8):
+        for y in range(0, height, 8):
+            pixels[x, y] = (x % 256, y % 256, (x + y) % 256)
+    out = io.BytesIO()
+    img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def load_app(args, rpc_url):
+    env = {
+        "JWT_SECRET": "bench-secret",
+        "FRONTEND": "http://localhost:3000",
+        "AWS_S3_BUCKET": "bench",
+        "AWS_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "RUN_BACKGROUND_JOBS": "0",
+        # one bench wallet at full speed would only measure 429s
+        "RATE_LIMITS_ENABLED": "0",
+        "PLATFORM_WALLET_ADDRESS_SOL": PLATFORM,
+        "SOLANA_NETWORK": rpc_url,
+    }
+    for key, value in env.items():
+        os.environ.setdefault(key, value)
+    if args.s3_endpoint:
+        os.environ["AWS_ENDPOINT_URL"] = args.s3_endpoint
+
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+    else:
+        import mongomock
+        import pymongo.mongo_client
+        shared = mongomock.MongoClient()
+        pymongo.mongo_client.MongoClient = lambda *a, **k: shared
+
+        # mongomock has no $type, format created_at directly
+        import product_listing
+        pipeline = product_listing.ProductListing.pipeline
+
+        def mongomock_pipeline(*a, **k):
+            stages = pipeline(*a, **k)
+            project = next(stage["$project"] for stage in stages if "$project" in stage)
+            project["created_at"] = {
+                "$dateToString": {"format": "%d.%m.%Y", "date": "$created_at"}
+            }
+            return stages
+
+        product_listing.ProductListing.pipeline = staticmethod(mongomock_pipeline)
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    import app
+
+    if not args.s3_endpoint:
+        fake = FakeS3()
+        app.s3 = fake
+        app.image_uploader.s3 = fake
+        app.sweeper.s3 = fake
+
+    app.mailjet = FakeMailjet()
+    receipt_image = make_image(800, 600, "JPEG")
+    app.receipt_renderer.image_cache.fetch = lambda url: receipt_image
+    return app
+
+
+# ---------- workload ----------
+class Workload:
+    """Builds one request per route call; seeded data lives under a run id."""
+
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = itertools.count()
+        self.upload = make_image()
+
+        token = app.jwt.encode(
+            {"wallet": SELLER, "exp": datetime.utcnow() + timedelta(days=1)},
+            app.app.config["SECRET_KEY"], algorithm="HS256",
+        )
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.product_ids = [str(pid) for pid in self.seed_products(args.products)]
+        self.delete_pool = []
+        self._pool_lock = threading.Lock()
+
+    def seed_products(self, count, wallet=SELLER):
+        now = datetime.utcnow()
+        docs = [{
+            "wallet": wallet,
+            "title": f"bench {i}",
+            "description": "benchmark product",
+            "price": 1.5,
+            "currency": "SOL",
+            "commission": 0.015,
+            "final_price": 1.485,
+            "image": f"https://bench.s3.us-east-1.amazonaws.com/products/bench_{i}.png",
+            "s3_key": f"products/bench_{i}.png",
+            "created_at": now - timedelta(seconds=i),
+            "expires_at": now + timedelta(days=1),
+            "stats": {"status": "unused", "count": 0},
+        } for i in range(count)]
+        if not docs:
+            return []
+        return self.app.products.insert_many(docs).inserted_ids
+
+    def prepare(self, route, requests):
+        if route == "delete_products":
+            ids = self.seed_products(requests * self.args.delete_batch, wallet="bench-delete")
+            self.delete_pool = [str(pid) for pid in ids]
+
+    def call(self, route, client):
+        n = next(self.counter)
+        product_id = random.choice(self.product_ids)
+
+        if route == "auth_wallet":
+            return client.post("/auth/wallet", json={
+                "wallet": f"bench-{self.run_id}-{n % 1000}", "consent": n % 2 == 0,
+            })
+        if route == "products":
+            return client.get("/products?limit=50", headers=self.auth)
+        if route == "create_product":
+            return client.post("/create_product", headers=self.auth, data={
+                "title": f"bench {n}",
+                "description": "benchmark product",
+                "price": "1.5",
+                "currency": "SOL",
+                "duration": "1d",
+                "image": (io.BytesIO(self.upload), "bench.png", "image/png"),
+            }, content_type="multipart/form-data")
+        if route == "create_presigned":
+            created = client.post("/create_product", headers=self.auth, json={
+                "title": f"bench {n}",
+                "description": "benchmark product",
+                "price": "1.5",
+                "currency": "SOL",
+                "duration": "1d",
+                "image_type": "image/png",
+                "image_size": len(self.upload),
+                "image_name": "bench.png",
+            })
+            if created.status_code != 200:
+                return created
+            body = created.get_json()
+            self.post_upload(body["upload"])
+            return client.post(f"/products/{body['product_id']}/image/finalize", headers=self.auth)
+        if route == "pay":
+            return client.get(f"/api/pay/{product_id}")
+        if route == "prepare_sol":
+            return client.post("/api/pay/prepare/sol", json={
+                "product_id": product_id, "buyer_wallet": BUYER,
+            })
+        if route == "transaction":
+            return client.post(f"/api/products/{product_id}/transaction", json={
+                "tx_hash": f"bench-{self.run_id}-{n}", "consents": ["terms_of_service"],
+            })
+        if route == "delete_products":
+            with self._pool_lock:
+                ids = self.delete_pool[:self.args.delete_batch]
+                del self.delete_pool[:self.args.delete_batch]
+            return client.post("/delete-products", json={"ids": ids})
+        if route == "send_receipt":
+            return client.post("/api/send-receipt", json={
+                "product_id": product_id,
+                "title": "bench",
+                "price": 1.5,
+                "currency": "SOL",
+                "sellerWallet": SELLER,
+                "buyer_wallet": BUYER,
+                "tx_hash": f"bench-receipt-{self.run_id}-{n}",
+                "image": "https://bench.s3.us-east-1.amazonaws.com/products/bench_0.png",
+                "email": "buyer@example.com",
+            })
+        raise ValueError(route)
+
+    def post_upload(self, upload):
+        """The browser's part of a presigned upload, straight to S3."""
+        if upload["url"].startswith("fake-s3://"):
+            self.app.image_uploader.s3.post(upload["fields"], self.upload)
+            return
+        import requests
+        requests.post(
+            upload["url"], data=upload["fields"],
+            files={"file": ("bench.png", self.upload, "image/png")}, timeout=30,
+        ).raise_for_status()
+
+
+# ---------- measurement ----------
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_route(workload, route, requests, concurrency, alloc_samples):
+    workload.prepare(route, requests + alloc_samples)
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(_):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = workload.app.app.test_client()
+        started = time.perf_counter()
+        resp = workload.call(route, client)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not 200 <= resp.status_code < 300:
+                errors.append(resp.status_code)
+
+    # warm caches and lazy index creation outside the measured window
+    one(None)
+    latencies.clear()
+    errors.clear()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    client = workload.app.app.test_client()
+    peaks = []
+    tracemalloc.start()
+    for _ in range(alloc_samples):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        workload.call(route, client)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "alloc_peak_kib": round(sum(peaks) / len(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args):
+    server, _ = solana_stub.serve(args.rpc_port)
+    app = load_app(args, f"http://127.0.0.1:{server.server_port}")
+    workload = Workload(app, args)
+
+    routes = args.routes.split(",") if args.routes else ROUTES
+    results = {}
+    print(f"{'route':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'alloc KiB':>10} {'errors':>7}")
+    for route in routes:
+        r = run_route(workload, route, args.requests, args.concurrency, args.alloc_samples)
+        results[route] = r
+        print(f"{route:<16} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['alloc_peak_kib'] or 0:>10.1f} {r['errors']:>7}")
+    server.shutdown()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "mongo": "mongod" if args.mongo_uri else "mongomock",
+        "s3": args.s3_endpoint or "fake",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "routes": results,
+    }
+    out = args.out or os.path.join(BENCH_DIR, "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+
+
+# ---------- compare ----------
+# metric -> True when higher is better
+COMPARED = {"rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "alloc_peak_kib": False}
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"{base['commit']} -> {head['commit']} (threshold {args.threshold:.0%})")
+    regressions = []
+    for route, new in head["routes"].items():
+        old = base["routes"].get(route) or {}
+        # fast failures look like a speedup, so errors are judged first
+        new_statuses = set(new.get("error_statuses", [])) - set(old.get("error_statuses", []))
+        if new.get("errors", 0) > old.get("errors", 0) or new_statuses:
+            regressions.append((route, "errors", (
+                f"{old.get('errors', 0)} -> {new.get('errors', 0)}, "
+                f"statuses {sorted(new.get('error_statuses', []))}"
+            )))
+            print(f"  {route:<16} errors {old.get('errors', 0)} -> {new.get('errors', 0)} !")
+            continue
+        if not old:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED.items():
+            if not old.get(metric) or new.get(metric) is None:
+                continue
+            change = (new[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > args.threshold:
+                flag = " !"
+                regressions.append((route, metric, f"{change:+.1%}"))
+            changes.append(f"{metric} {change:+.1%}{flag}")
+        print(f"  {route:<16} " + "  ".join(changes))
+
+    if regressions:
+        print("\nRegressions:")
+        for route, metric, change in regressions:
+            print(f"  {route} {metric} {change}")
+        raise SystemExit(1)
+    print("\nNo regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="benchmark the routes and store JSON results")
+    run_parser.add_argument("--requests", type=int, default=300, help="per route")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--routes", help=f"comma separated subset of {','.join(ROUTES)}")
+    run_parser.add_argument("--products", type=int, default=200, help="seeded for the seller")
+    run_parser.add_argument("--delete-batch", type=int, default=10, help="ids per /delete-products")
+    run_parser.add_argument("--alloc-samples", type=int, default=20)
+    run_parser.add_argument("--mongo-uri", help="use this mongod instead of mongomock")
+    run_parser.add_argument("--s3-endpoint", help="S3-compatible endpoint instead of the fake")
+    run_parser.add_argument("--rpc-port", type=int, default=0, help="Solana stub port, 0 = any")
+    run_parser.add_argument("--out", help="results file, default results/<commit>.json")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cold start cost: `import app` and the first requests, in fresh processes.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --importtime 15
+
+Every run is a new interpreter with background jobs disabled and mongomock
+standing in for Mongo (no network is touched), so the numbers are the
+Python-side cost an autoscaled instance or a test process pays before it
+can answer. --importtime lists the slowest modules from `-X importtime`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.update({{
+    "JWT_SECRET": "bench", "FRONTEND": "http://localhost:3000",
+    "AWS_S3_BUCKET": "bench", "AWS_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench",
+    "RUN_BACKGROUND_JOBS": "0", "SOLANA_NETWORK": "http://127.0.0.1:9",
+}})
+import mongomock, pymongo.mongo_client
+shared = mongomock.MongoClient()
+pymongo.mongo_client.MongoClient = lambda *a, **k: shared
+from datetime import datetime, timedelta
+product_id = shared["neonflick-bps"]["products"].insert_one({{
+    "wallet": "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T", "price": 1.5,
+    "currency": "SOL", "commission": 0.015, "title": "t",
+    "image": "https://bench.s3.us-east-1.amazonaws.com/products/bench.png",
+    "expires_at": datetime.utcnow() + timedelta(days=1),
+}}).inserted_id
+
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+
+client = app.app.test_client()
+client.get("/")
+first_root = time.perf_counter()
+client.get(f"/api/pay/{{product_id}}")
+first_pay = time.perf_counter()
+client.get("/calculate_commission_sol?price=1.5")
+first_commission = time.perf_counter()
+
+with open(sys.argv[1], "w") as out:
+    json.dump({{
+        "import_ms": (imported - started) * 1000,
+        "first_root_ms": (first_root - imported) * 1000,
+        "first_pay_ms": (first_pay - first_root) * 1000,
+        "first_commission_ms": (first_commission - first_pay) * 1000,
+        "modules": len(sys.modules),
+    }}, out)
+"""
+
+
+def probe():
+    # results go through a file, background threads may print to stdout
+    with tempfile.NamedTemporaryFile("r", suffix=".json") as out:
+        subprocess.run(
+            [sys.executable, "-c", PROBE.format(root=ROOT), out.name],
+            capture_output=True, check=True, cwd=ROOT,
+        )
+        return json.load(out)
+
+
+def importtime(top):
+    code = PROBE.format(root=ROOT).split("started = time.perf_counter()")[0] + "import app\n"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.rstrip()))
+
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, metavar="N",
+                        help="show the N modules with the highest cumulative import time")
+    args = parser.parse_args()
+
+    if args.importtime:
+        importtime(args.importtime)
+        return
+
+    results = [probe() for _ in range(args.runs)]
+    print(f"median of {args.runs} fresh processes")
+    for key in ("import_ms", "first_root_ms", "first_pay_ms", "first_commission_ms"):
+        print(f"  {key:<22} {statistics.median(r[key] for r in results):9.1f}")
+    print(f"  {'modules loaded':<22} {statistics.median(r['modules'] for r in results):9.0f}")
+
+
+if __name__ == "__main__":
+    main()
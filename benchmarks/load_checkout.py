@@ -0,0 +1,133 @@
+"""Checkout load test: WSGI (Flask) vs ASGI (asgi.py) under concurrent buyers.
+
+    RATE_LIMITS_ENABLED=0 gunicorn -w 4 -b :5000 app:app             # WSGI
+    RATE_LIMITS_ENABLED=0 uvicorn asgi:app --port 8000 --workers 4   # ASGI
+    python benchmarks/load_checkout.py --product-id <id> --buyer <wallet> \\
+        --target wsgi=http://localhost:5000 --target asgi=http://localhost:8000 \\
+        --concurrency 500 --duration 30
+
+Every virtual buyer loops over the checkout flow: GET /api/pay/<id>, then
+POST /api/pay/prepare/sol. With --record it also posts a transaction with
+a random hash, so only use that against a staging database. Both servers
+should point at the same Mongo and RPC node (MONGO_URI, SOLANA_NETWORK)
+and run the same number of worker processes.
+
+All buyers share one client IP, so both servers must run with
+RATE_LIMITS_ENABLED=0; a run that gets any 429 is reported as invalid.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def buyer(client, args, deadline, latencies, errors, limited):
+    while time.perf_counter() < deadline:
+        steps = [
+            ("pay", "GET", f"/api/pay/{args.product_id}", None),
+            ("prepare", "POST", "/api/pay/prepare/sol",
+             {"product_id": args.product_id, "buyer_wallet": args.buyer}),
+        ]
+        if args.record:
+            steps.append(("transaction", "POST", f"/api/products/{args.product_id}/transaction",
+                          {"tx_hash": f"load-{uuid.uuid4().hex}", "consents": ["terms"]}))
+
+        for step, method, path, body in steps:
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body)
+                failed = resp.status_code >= 400
+                if resp.status_code == 429:
+                    limited[step] = limited.get(step, 0) + 1
+            except httpx.HTTPError:
+                failed = True
+            latencies[step].append(time.perf_counter() - started)
+            if failed:
+                errors[step] = errors.get(step, 0) + 1
+
+
+async def run_target(base_url, args):
+    steps = ["pay", "prepare"] + (["transaction"] if args.record else [])
+    latencies = {step: [] for step in steps}
+    errors = {}
+    limited = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        # one warm-up pass so connection setup and cold caches aren't measured
+        await buyer(client, args, time.perf_counter() + 1, {s: [] for s in steps}, {}, limited)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            buyer(client, args, deadline, latencies, errors, limited) for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "requests": len(all_latencies),
+        "rps": len(all_latencies) / elapsed,
+        "checkouts_per_s": len(latencies["prepare"]) / elapsed,
+        "errors": errors,
+        "rate_limited": limited,
+        "steps": {
+            step: {
+                "p50_ms": percentile(values, 50) * 1000 if values else None,
+                "p99_ms": percentile(values, 99) * 1000 if values else None,
+                "mean_ms": statistics.mean(values) * 1000 if values else None,
+            }
+            for step, values in latencies.items()
+        },
+    }
+
+
+def print_result(label, result):
+    print(f"\n{label}: {result['requests']} requests, {result['rps']:.0f} req/s, "
+          f"{result['checkouts_per_s']:.0f} checkouts/s, errors {result['errors'] or 0}")
+    for step, stats in result["steps"].items():
+        if stats["p50_ms"] is None:
+            continue
+        print(f"  {step:<12} p50 {stats['p50_ms']:8.1f} ms   p99 {stats['p99_ms']:8.1f} ms   "
+              f"mean {stats['mean_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", action="append", required=True,
+                        help="label=base_url, repeat to compare servers")
+    parser.add_argument("--product-id", default=os.getenv("LOAD_PRODUCT_ID"), required=False)
+    parser.add_argument("--buyer", default=os.getenv("LOAD_BUYER_WALLET"))
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--record", action="store_true",
+                        help="also post a transaction per checkout (staging only)")
+    args = parser.parse_args()
+    if not args.product_id or not args.buyer:
+        parser.error("--product-id and --buyer are required")
+
+    for target in args.target:
+        label, _, base_url = target.partition("=")
+        result = asyncio.run(run_target(base_url or label, args))
+        print_result(label, result)
+        if result["rate_limited"]:
+            sys.exit(f"\n{label} answered 429 {result['rate_limited']}, the numbers above are "
+                     "not comparable; restart it with RATE_LIMITS_ENABLED=0")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Local Solana JSON-RPC stub for exercising the app without a cluster.
+
+    python benchmarks/solana_stub.py --port 8899
+    SOLANA_NETWORK=http://localhost:8899 flask --app app verify-transactions
+
+Answers getLatestBlockhash, getSignatureStatuses and getTransaction.
+Payments are registered with POST /_stub/transactions:
+
+    {"signature": "...", "transfers": [{"to": "<wallet>", "lamports": 123}],
+     "err": null, "confirmation_status": "finalized"}
+
+Unknown signatures come back as not found (null status / null tx).
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FEE_PAYER = "11111111111111111111111111111111"
+
+
+class SolanaStub:
+    def __init__(self):
+        self.transactions = {}
+        self.slot = 1000
+        self._lock = threading.Lock()
+
+    def add(self, signature, transfers, err=None, confirmation_status="finalized"):
+        with self._lock:
+            self.transactions[signature] = {
+                "transfers": transfers,
+                "err": err,
+                "confirmation_status": confirmation_status,
+            }
+
+    def getLatestBlockhash(self, params):
+        with self._lock:
+            self.slot += 1
+            slot = self.slot
+        return {
+            "context": {"slot": slot},
+            "value": {"blockhash": f"StubBlockhash{slot}", "lastValidBlockHeight": slot + 150},
+        }
+
+    def getSignatureStatuses(self, params):
+        value = []
+        for signature in params[0]:
+            tx = self.transactions.get(signature)
+            value.append(None if tx is None else {
+                "slot": self.slot,
+                "confirmations": None,
+                "err": tx["err"],
+                "confirmationStatus": tx["confirmation_status"],
+            })
+        return {"context": {"slot": self.slot}, "value": value}
+
+    def getTransaction(self, params):
+        tx = self.transactions.get(params[0])
+        if tx is None:
+            return None
+        return {
+            "slot": self.slot,
+            "meta": {"err": tx["err"], "fee": 5000, "innerInstructions": []},
+            "transaction": {
+                "signatures": [params[0]],
+                "message": {"instructions": [
+                    {
+                        "program": "system",
+                        "programId": "11111111111111111111111111111111",
+                        "parsed": {"type": "transfer", "info": {
+                            "source": FEE_PAYER,
+                            "destination": t["to"],
+                            "lamports": t["lamports"],
+                        }},
+                    }
+                    for t in tx["transfers"]
+                ]},
+            },
+        }
+
+    def handle(self, request):
+        method = getattr(self, request.get("method", ""), None)
+        if method is None:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": method(request.get("params", []))}
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/_stub/transactions":
+                stub.add(body["signature"], body.get("transfers", []), body.get("err"),
+                         body.get("confirmation_status", "finalized"))
+                payload = {"ok": True}
+            elif isinstance(body, list):
+                payload = [stub.handle(item) for item in body]
+            else:
+                payload = stub.handle(body)
+
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8899, stub=None):
+    """Start the stub on a background thread, returns (server, stub)."""
+    stub = stub or SolanaStub()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(stub))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8899)
+    args = parser.parse_args()
+
+    stub = SolanaStub()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(stub))
+    print(f"Solana stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
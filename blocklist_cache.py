@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class BlocklistCache:
+    """In-process cache in front of the blocked_users collection.
+
+    Lookups are cached both ways (blocked / not blocked) for `ttl` seconds,
+    at most `maxsize` wallets, least recently used evicted first. A change
+    stream on the collection keeps entries fresh; when change streams are not
+    available (standalone mongod, network errors) the cache falls back to a
+    full reload every `reload_interval` seconds.
+    """
+
+    def __init__(self, collection, maxsize=10000, ttl=300, reload_interval=60):
+        self.collection = collection
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.reload_interval = reload_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._watcher = None
+        # bumped by every change the watcher applies, see remember()
+        self._version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.reloads = 0
+        self.mode = "idle"
+
+    # ---------- lookups ----------
+    def is_blocked(self, wallet):
+        version = self.version()
+        blocked = self.peek(wallet)
+        if blocked is None:
+            blocked = bool(self.collection.find_one({"wallet": wallet}, {"_id": 1}))
+            self.remember(wallet, blocked, version)
+        return blocked
+
+    def version(self):
+        """Taken before a lookup and handed to remember() with its result."""
+        with self._lock:
+            return self._version
+
+    def peek(self, wallet):
+        """Cached answer for `wallet`, None on a miss.
+
+        Lets async callers do the Mongo lookup with their own driver and
+        hand the result back through remember().
+        """
+        self._ensure_watcher()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(wallet)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(wallet)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def remember(self, wallet, blocked, version):
+        """Cache a lookup result unless a change was applied since `version`.
+
+        The read may have happened before a block that the watcher already
+        cached; writing it back would hide the block for a whole ttl.
+        """
+        with self._lock:
+            if version == self._version:
+                self._put(wallet, blocked)
+
+    def _put(self, wallet, blocked):
+        self._entries[wallet] = (blocked, time.monotonic() + self.ttl)
+        self._entries.move_to_end(wallet)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, wallet=None):
+        with self._lock:
+            self._version += 1
+            if wallet is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(wallet, None)
+            self.invalidations += 1
+
+    def reload(self):
+        wallets = [
+            doc["wallet"]
+            for doc in self.collection.find({}, {"_id": 0, "wallet": 1}).limit(self.maxsize)
+            if doc.get("wallet")
+        ]
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._version += 1
+            self._entries = OrderedDict((w, (True, expires)) for w in wallets)
+            self.reloads += 1
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "reloads": self.reloads,
+        }
+
+    # ---------- invalidation ----------
+    def _ensure_watcher(self):
+        if self._watcher is not None:
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch_forever, daemon=True)
+        self._watcher.start()
+
+    def _apply_change(self, change):
+        op = change.get("operationType")
+        doc = change.get("fullDocument") or {}
+        wallet = doc.get("wallet")
+
+        if op in ("insert", "replace", "update") and wallet:
+            with self._lock:
+                self._version += 1
+                self._put(wallet, True)
+        else:
+            # deletes only carry the _id, so drop everything and re-read lazily
+            self.invalidate()
+
+    def _watch_forever(self):
+        while True:
+            try:
+                with self.collection.watch(full_document="updateLookup") as stream:
+                    # events before the stream opened are covered by the reload
+                    self.reload()
+                    self.mode = "change_stream"
+                    for change in stream:
+                        self._apply_change(change)
+            except Exception as e:
+                if self.mode != "polling":
+                    print(f"Blocklist change stream unavailable, polling: {e}")
+                self.mode = "polling"
+                try:
+                    self.reload()
+                except Exception as reload_error:
+                    print(f"Blocklist reload failed: {reload_error}")
+
+            time.sleep(self.reload_interval)
@@ -0,0 +1,51 @@
+from bson.objectid import ObjectId
+
+from storage import delete_s3_objects, product_image_keys
+
+
+def delete_products_by_id(products, s3, bucket, ids):
+    """Delete many products and their images in a fixed number of round trips.
+
+    One $in query finds the products, one delete_many removes them and
+    their S3 keys go through delete_objects. Returns (deleted_ids, errors)
+    in the /delete-products response shape.
+    """
+    errors = []
+    oids = {}
+
+    for product_id in ids:
+        try:
+            oid = ObjectId(product_id)
+        except Exception:
+            errors.append({"id": product_id, "error": "Invalid ObjectId"})
+            continue
+        oids.setdefault(oid, product_id)
+
+    found = list(products.find(
+        {"_id": {"$in": list(oids)}},
+        {"_id": 1, "s3_key": 1, "image": 1, "image_variants": 1, "pending_image": 1}
+    )) if oids else []
+
+    found_ids = {item["_id"] for item in found}
+    for oid, product_id in oids.items():
+        if oid not in found_ids:
+            errors.append({"id": product_id, "error": "Product not found"})
+
+    if not found:
+        return [], errors
+
+    products.delete_many({"_id": {"$in": list(found_ids)}})
+
+    keys = [key for item in found for key in product_image_keys(item)]
+    _, s3_errors = delete_s3_objects(s3, bucket, keys)
+
+    deleted_ids = []
+    for item in found:
+        product_id = oids[item["_id"]]
+        failed = [s3_errors[k] for k in product_image_keys(item) if k in s3_errors]
+        if failed:
+            errors.append({"id": product_id, "error": "; ".join(failed)})
+        else:
+            deleted_ids.append(product_id)
+
+    return deleted_ids, errors
@@ -0,0 +1,224 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+
+from commission import sol_to_lamports
+from storage import pick_image_variant
+
+# prepare is refused when the product expires sooner than this
+MIN_REMAINING_SECONDS = 30
+
+
+class CheckoutError(Exception):
+    """A checkout request that can't go ahead.
+
+    `error` is set for the failures the frontend handles by name
+    (wallet_blocked, rpc_unavailable); the others carry only `message`.
+    Both servers answer with body() as JSON.
+    """
+
+    def __init__(self, status, message, error=None, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.error = error
+        self.headers = headers or {}
+
+    def body(self):
+        # the frontend shows `message`, older clients read `error`
+        return {"error": self.error or self.message, "message": self.message}
+
+
+def parse_product_id(product_id, message="Invalid product id"):
+    try:
+        return ObjectId(product_id)
+    except Exception:
+        raise CheckoutError(400, message)
+
+
+def check_payable(product, seller_blocked, blocked_message, now=None):
+    """Validate a product for payment, returns (expires_at, remaining seconds).
+
+    `seller_blocked` is the blocklist answer for the product's wallet, the
+    caller looks it up so this stays free of I/O.
+    """
+    if not product:
+        raise CheckoutError(404, "Product not found")
+
+    if not product.get("wallet"):
+        raise CheckoutError(500, "Product wallet not found")
+
+    if not product.get("image"):
+        # created with a presigned upload that hasn't been finalized yet
+        raise CheckoutError(409, "Product image upload not finished")
+
+    if seller_blocked:
+        raise CheckoutError(403, blocked_message, error="wallet_blocked")
+
+    expires_at = product.get("expires_at")
+    if not expires_at:
+        raise CheckoutError(500, "Product expiration not set")
+
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+    now = now or datetime.now(timezone.utc)
+    remaining_seconds = int((expires_at - now).total_seconds())
+    if remaining_seconds <= 0:
+        raise CheckoutError(410, "Product expired")
+
+    return expires_at, remaining_seconds
+
+
+def payment_payload(product, expires_at, image_width):
+    return {
+        "product_id": str(product["_id"]),
+        "sellerWallet": product["wallet"],
+        "price": product["price"],
+        "currency": product["currency"],
+        "commission": product.get("commission"),
+        "expires_at": expires_at.isoformat(),
+        "title": product["title"],
+        "image": pick_image_variant(product, image_width),
+        "description": product.get("description"),
+    }
+
+
+def payment_page(product, expires_at, remaining_seconds, image_width, max_age,
+                 if_none_match=None):
+    """(status, body, headers) of the public payment page.
+
+    The body covers every field shown, so its hash is a strong ETag; it is
+    serialized here so both servers hand out the same one. Caches may keep
+    the page `max_age` seconds, never past the product's expiry.
+    """
+    body = json.dumps(
+        payment_payload(product, expires_at, image_width), sort_keys=True, separators=(",", ":")
+    ).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={min(max_age, remaining_seconds)}",
+    }
+
+    tags = {t.strip().removeprefix("W/") for t in (if_none_match or "").split(",")}
+    if etag in tags or "*" in tags:
+        return 304, b"", headers
+    return 200, body, headers
+
+
+def parse_prepare_request(data):
+    """Returns (product ObjectId, buyer wallet) from a prepare body."""
+    product_id = data.get("product_id")
+    buyer_wallet = data.get("buyer_wallet")
+
+    if not product_id or not buyer_wallet:
+        raise CheckoutError(400, "Missing product_id or buyer_wallet")
+
+    return parse_product_id(product_id, "Invalid product_id"), buyer_wallet
+
+
+def expected_transfers(product, platform_wallet):
+    """Lamport transfers a SOL payment for `product` must contain.
+
+    The same list is handed to the buyer by prepare and stored with the
+    recorded transaction for on-chain verification.
+    """
+    from solana.publickey import PublicKey
+
+    commission_lamports = sol_to_lamports(product.get("commission", 0))
+    seller_lamports = sol_to_lamports(product["price"]) - commission_lamports
+
+    if seller_lamports <= 0:
+        raise CheckoutError(500, "Invalid commission configuration")
+
+    transfers = []
+    if commission_lamports > 0:
+        transfers.append({"to": str(PublicKey(platform_wallet)), "lamports": commission_lamports})
+    transfers.append({"to": str(PublicKey(product["wallet"])), "lamports": seller_lamports})
+    return transfers
+
+
+def sol_transfers(product, buyer_wallet, platform_wallet):
+    """Lamport transfers for a SOL payment, returns (fee payer, transfers)."""
+    from solana.publickey import PublicKey
+
+    transfers = expected_transfers(product, platform_wallet)
+    return str(PublicKey(buyer_wallet)), transfers
+
+
+def check_prepare_window(remaining_seconds):
+    if remaining_seconds < MIN_REMAINING_SECONDS:
+        raise CheckoutError(409, "Not enough time left to process transaction")
+
+
+def blockhash_unavailable():
+    return CheckoutError(
+        503,
+        "Solana network is temporarily unavailable, please retry.",
+        error="rpc_unavailable",
+        headers={"Retry-After": "5"},
+    )
+
+
+def prepare_response(fee_payer, transfers, blockhash, last_valid_block_height, remaining_seconds):
+    return {
+        "blockhash": blockhash,
+        "fee_payer": fee_payer,
+        "transfers": transfers,
+        "last_valid_block_height": last_valid_block_height,
+        "expires_in": remaining_seconds,
+    }
+
+
+def parse_transaction_request(product_id, data):
+    """Validate a transaction body, returns (product ObjectId, tx_hash, consents).
+
+    Errors here are answered as {"error": message} like the rest of the
+    transaction route.
+    """
+    if not data:
+        raise CheckoutError(400, "JSON body required")
+
+    tx_hash = data.get("tx_hash")
+    consents = data.get("consents")
+
+    if not tx_hash:
+        raise CheckoutError(400, "tx_hash required")
+
+    if not isinstance(consents, list) or not consents:
+        raise CheckoutError(400, "consents must be a non-empty list")
+
+    try:
+        product_object_id = ObjectId(product_id)
+    except Exception:
+        raise CheckoutError(400, "invalid product_id")
+
+    return product_object_id, tx_hash, consents
+
+
+def verification_fields(product, platform_wallet, now=None):
+    """Extra fields that queue a recorded SOL transaction for verification.
+
+    Products that aren't priced in SOL, or can't produce a valid transfer
+    list, are recorded without them and never verified.
+    """
+    if str(product.get("currency", "")).upper() != "SOL":
+        return {}
+    try:
+        transfers = expected_transfers(product, platform_wallet)
+    except Exception as e:
+        print(f"Cannot verify payments for product {product.get('_id')}: {e}")
+        return {}
+    return {
+        "verification": "pending",
+        "expected_transfers": transfers,
+        "next_check_at": now or datetime.utcnow(),
+    }
+
+
+def buyer_consents(consents, now=None):
+    now_iso = (now or datetime.utcnow()).isoformat() + "Z"
+    return {consent: now_iso for consent in consents}
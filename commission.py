@@ -0,0 +1,60 @@
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# tier i applies while price < TIER_BOUNDS[i] (the 100 SOL tier includes 100)
+TIER_BOUNDS = [
+    10_000_000,         # 0.01 SOL
+    100_000_000,        # 0.1 SOL
+    1_000_000_000,      # 1 SOL
+    100_000_000_001,    # 100 SOL, inclusive
+]
+# commission per tier in basis points; the last tier is the flat cap
+TIER_RATES_BPS = [1000, 500, 100, 25, 0]
+
+MIN_COMMISSION_LAMPORTS = 100_000       # 0.0001 SOL on the smallest tier
+FLAT_COMMISSION_LAMPORTS = 250_000_000  # 0.25 SOL above 100 SOL
+
+
+def sol_to_lamports(price) -> int:
+    amount = Decimal(str(price)) * LAMPORTS_PER_SOL
+    return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def lamports_to_sol(lamports) -> float:
+    return lamports / LAMPORTS_PER_SOL
+
+
+def round_sol(lamports, places=4) -> float:
+    """Lamports as SOL rounded half-up, without float rounding drift."""
+    amount = Decimal(int(lamports)) / LAMPORTS_PER_SOL
+    return float(amount.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP))
+
+
+def commission_lamports(price_lamports: int) -> int:
+    tier = bisect_right(TIER_BOUNDS, price_lamports)
+    if tier == len(TIER_BOUNDS):
+        return FLAT_COMMISSION_LAMPORTS
+
+    commission = (price_lamports * TIER_RATES_BPS[tier] + 5_000) // 10_000
+    if tier == 0:
+        commission = max(commission, MIN_COMMISSION_LAMPORTS)
+    return commission
+
+
+def commission_lamports_batch(prices_lamports):
+    """Vectorized commission_lamports over an array of lamport prices."""
+    import numpy as np
+
+    prices = np.asarray(prices_lamports, dtype=np.int64)
+    tiers = np.searchsorted(np.array(TIER_BOUNDS, dtype=np.int64), prices, side="right")
+
+    rates = np.array(TIER_RATES_BPS, dtype=np.int64)
+    commission = (prices * rates[tiers] + 5_000) // 10_000
+    commission = np.where(tiers == 0, np.maximum(commission, MIN_COMMISSION_LAMPORTS), commission)
+    return np.where(tiers == len(TIER_BOUNDS), FLAT_COMMISSION_LAMPORTS, commission)
+
+
+def calculate_sol_commission(price: float) -> float:
+    return lamports_to_sol(commission_lamports(sol_to_lamports(price)))
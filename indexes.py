@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from product_listing import DEFAULT_LIMIT, ProductListing, encode_cursor
+from product_transactions import FOR_PRODUCTS_SORT, for_products_query, legacy_hash_query
+from receipt_queue import CLAIM_SORT, claimable_query
+from seller_stats import RANGE_SORT, range_query
+from storage import VARIANTS_PENDING
+from sweeper import EXPIRY_SORT, expired_query
+from tx_verifier import DUE_SORT, due_query
+
+# collection -> [(keys, options)]
+INDEXES = {
+    "users": [
+        ([("wallet", ASCENDING)], {"unique": True}),
+    ],
+    "blocked_users": [
+        ([("wallet", ASCENDING)], {"unique": True}),
+    ],
+    "products": [
+        ([("wallet", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("expires_at", ASCENDING)], {}),
+        ([("variants_pending", ASCENDING)], {"sparse": True}),
+    ],
+    "transactions": [
+        ([("hash", ASCENDING)], {"unique": True}),
+        ([("product_id", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("verification", ASCENDING), ("next_check_at", ASCENDING)], {}),
+    ],
+    "seller_stats": [
+        ([("wallet", ASCENDING), ("day", ASCENDING), ("currency", ASCENDING)], {"unique": True}),
+    ],
+    "rate_limits": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "receipt_jobs": [
+        ([("tx_hash", ASCENDING)], {"unique": True}),
+        ([("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+    ],
+}
+
+
+def hot_queries(now=None):
+    """Queries the routes and jobs run, checked by check_query_plans.
+
+    Built with the same helpers the code runs them through, so a changed
+    filter or sort is checked as it is. Returns (name, collection, query)
+    tuples, `query` being {"filter", "sort"} for a find or {"pipeline"}
+    for an aggregate.
+    """
+    now = now or datetime.utcnow()
+    product_id = ObjectId()
+
+    return [
+        ("auth: user by wallet", "users", {"filter": {"wallet": "w"}}),
+        ("blocklist lookup", "blocked_users", {"filter": {"wallet": "w"}}),
+        ("products: first page for wallet", "products",
+         {"pipeline": ProductListing.pipeline("w", DEFAULT_LIMIT)}),
+        ("products: next page for wallet", "products",
+         {"pipeline": ProductListing.pipeline("w", DEFAULT_LIMIT, encode_cursor(now, product_id))}),
+        ("expiry sweep", "products", {"filter": expired_query(now), "sort": EXPIRY_SORT}),
+        ("images waiting for variants", "products", {"filter": VARIANTS_PENDING}),
+        ("transaction hash in unmigrated product", "products",
+         {"filter": legacy_hash_query(product_id, "h")}),
+        ("transaction by hash", "transactions", {"filter": {"hash": "h"}}),
+        ("transactions for products", "transactions",
+         {"filter": for_products_query([product_id]), "sort": FOR_PRODUCTS_SORT}),
+        ("transactions to verify", "transactions", {"filter": due_query(now), "sort": DUE_SORT}),
+        ("seller stats for wallet", "seller_stats",
+         {"filter": range_query("w", now - timedelta(days=30), now), "sort": RANGE_SORT}),
+        ("receipt job by tx_hash", "receipt_jobs", {"filter": {"tx_hash": "h"}}),
+        ("receipt jobs due", "receipt_jobs", {"filter": claimable_query(now), "sort": CLAIM_SORT}),
+    ]
+
+
+def create_indexes(collection, name):
+    """Create INDEXES[name] on `collection`, for code that uses it directly."""
+    for keys, options in INDEXES[name]:
+        collection.create_index(keys, **options)
+
+
+def ensure_indexes(db):
+    """Create every index the app relies on. Safe to run repeatedly.
+
+    Returns a list of (collection, index name, error or None).
+    """
+    report = []
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            try:
+                name = db[collection].create_index(keys, **options)
+                report.append((collection, name, None))
+            except OperationFailure as e:
+                # e.g. existing duplicates block a unique index
+                name = "_".join(f"{k}_{d}" for k, d in keys)
+                report.append((collection, name, str(e)))
+    return report
+
+
+def _stages(plan):
+    yield plan.get("stage")
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            yield from _stages(plan[child])
+    for sub in plan.get("inputStages", []):
+        yield from _stages(sub)
+
+
+def explain_query(db, collection, query, limit=50):
+    if "pipeline" in query:
+        plan = db.command(
+            "explain",
+            {"aggregate": collection, "pipeline": query["pipeline"], "cursor": {}},
+            verbosity="executionStats",
+        )
+        # the query layer's plan sits in a $cursor stage unless the whole
+        # pipeline was pushed down into it
+        if "queryPlanner" not in plan:
+            plan = next(
+                (stage["$cursor"] for stage in plan.get("stages", []) if "$cursor" in stage), plan
+            )
+        return plan
+
+    cursor = db[collection].find(query["filter"]).limit(limit)
+    if query.get("sort"):
+        cursor = cursor.sort(query["sort"])
+    return cursor.explain()
+
+
+def check_query_plans(db, max_examined_ratio=2.0, slack=10):
+    """Explain every hot query, returns a list of (name, problem) failures.
+
+    A query fails when its winning plan contains a COLLSCAN, or when it
+    examines more than max_examined_ratio * returned + slack documents.
+    """
+    failures = []
+    for name, collection, query in hot_queries():
+        plan = explain_query(db, collection, query)
+        winning = plan["queryPlanner"]["winningPlan"]
+        stages = set(_stages(winning))
+
+        if "COLLSCAN" in stages:
+            failures.append((name, "COLLSCAN"))
+            continue
+
+        stats = plan.get("executionStats", {})
+        returned = stats.get("nReturned", 0)
+        examined = stats.get("totalDocsExamined", 0)
+        if examined > returned * max_examined_ratio + slack:
+            failures.append((name, f"examined {examined} docs for {returned} returned"))
+
+    return failures
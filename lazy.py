@@ -0,0 +1,32 @@
+import os
+import threading
+
+
+class LazyClient:
+    """Stands in for a client that is only built on first use.
+
+    Attribute and item access go to the real object, created by `factory`
+    once per process: a forked worker builds its own instead of sharing
+    the parent's sockets.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        pid = os.getpid()
+        if self._instance is None or self._pid != pid:
+            with self._lock:
+                if self._instance is None or self._pid != pid:
+                    self._instance = self._factory()
+                    self._pid = pid
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
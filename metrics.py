@@ -0,0 +1,283 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# seconds; covers sub-ms cache hits up to slow RPC/mail calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), function=None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        lines = self.header()
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                print(f"Metric {self.name} failed: {e}")
+                return lines
+            if value is not None:
+                lines.append(f"{self.name} {_number(value)}")
+            return lines
+
+        with self._lock:
+            values = sorted(self._values.items())
+        return lines + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+
+        lines = self.header()
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames, key, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format.
+
+    Each worker process keeps its own registry; Prometheus scrapes every
+    worker (or sums them) the same way it would with prometheus_client.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), function=None):
+        return self._add(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+http_latency = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+dependency_latency = REGISTRY.histogram(
+    "dependency_duration_seconds", "Outbound call latency", ("dependency", "operation")
+)
+dependency_errors = REGISTRY.counter(
+    "dependency_errors_total", "Failed outbound calls", ("dependency", "operation")
+)
+
+
+def observe_dependency(dependency, operation, seconds, failed=False):
+    dependency_latency.observe(seconds, dependency=dependency, operation=operation)
+    if failed:
+        dependency_errors.inc(dependency=dependency, operation=operation)
+
+
+@contextmanager
+def timed(dependency, operation):
+    """Time an outbound call, counting it as an error if the block raises."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        observe_dependency(dependency, operation, time.perf_counter() - started, failed)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo listener recording every command as a `mongo` dependency call."""
+
+    def __init__(self):
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        # most commands name their collection, getMore carries a cursor id
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get("collection")
+        name = f"{event.command_name}:{collection}" if collection else event.command_name
+        with self._lock:
+            self._started[self._key(event)] = name
+
+    def _finish(self, event, failed):
+        with self._lock:
+            name = self._started.pop(self._key(event), event.command_name)
+        # duration_micros is measured by the driver, from send to reply
+        observe_dependency("mongo", name, event.duration_micros / 1e6, failed)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+
+def instrument_boto3(client, dependency="s3"):
+    """Time every API call of a boto3 client through its event hooks."""
+    service = client.meta.service_model.service_id.hyphenize()
+
+    def before(context, model, **kwargs):
+        context["metrics_call"] = (model.name, time.perf_counter())
+
+    def finish(context, failed):
+        call = context.pop("metrics_call", None)
+        if call is not None:
+            operation, started = call
+            observe_dependency(dependency, operation, time.perf_counter() - started, failed)
+
+    def after(context, http_response=None, **kwargs):
+        finish(context, http_response is None or http_response.status_code >= 400)
+
+    def error(context, **kwargs):
+        finish(context, True)
+
+    client.meta.events.register(f"before-call.{service}", before)
+    client.meta.events.register(f"after-call.{service}", after)
+    client.meta.events.register(f"after-call-error.{service}", error)
+    return client
+
+
+def instrument_flask(app):
+    """Record latency and count of every request by its route rule.
+
+    The rule (e.g. /api/pay/<product_id>) is used instead of the path so
+    the label set stays bounded.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            http_latency.observe(
+                time.perf_counter() - started, method=request.method, route=route
+            )
+            http_requests.inc(method=request.method, route=route, status=response.status_code)
+        return response
+
+    return app
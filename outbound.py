@@ -0,0 +1,160 @@
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import metrics
+
+outbound_requests = metrics.REGISTRY.counter(
+    "outbound_http_requests_total", "Requests sent through the shared outbound session", ("host",)
+)
+outbound_connections = metrics.REGISTRY.counter(
+    "outbound_http_connections_opened_total",
+    "New outbound connections, requests minus these were served over keep-alive",
+    ("host",),
+)
+outbound_retries = metrics.REGISTRY.counter(
+    "outbound_http_retries_total", "Outbound requests retried", ("host",)
+)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# (connect, read) seconds; hosts match exactly or, with a leading dot, by suffix
+DEFAULT_TIMEOUT = (3.05, 10)
+HOST_TIMEOUTS = {
+    "api.mailjet.com": (3.05, 15),
+    ".amazonaws.com": (3.05, 5),
+}
+
+
+class OutboundBusy(requests.ConnectionError):
+    """Every request slot for the host stayed taken for the connect timeout."""
+
+
+class _CountingRetry(Retry):
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None,
+                  _stacktrace=None):
+        if _pool is not None:
+            outbound_retries.inc(host=_pool.host)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        outbound_connections.inc(host=self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        outbound_connections.inc(host=self.host)
+        return super()._new_conn()
+
+
+def parse_timeouts(value):
+    """HOST_TIMEOUTS entries from "host=connect/read,.suffix=connect/read"."""
+    timeouts = {}
+    for entry in filter(None, (v.strip() for v in (value or "").split(","))):
+        host, limits = entry.split("=")
+        connect, read = limits.split("/")
+        timeouts[host.strip()] = (float(connect), float(read))
+    return timeouts
+
+
+class OutboundHTTP:
+    """Keep-alive session shared by every call to a third-party HTTP API.
+
+    Up to `pool_maxsize` connections per host stay open between calls, and
+    at most `max_concurrency` requests per host are in flight; callers
+    wait up to the connect timeout for a slot. Idempotent methods are
+    retried on connection errors, read errors and 429/5xx with jittered
+    exponential backoff (honouring Retry-After). Other methods are retried
+    only when the connection could not be made, so the request was never
+    sent.
+    """
+
+    def __init__(self, pool_maxsize=20, max_concurrency=20, retries=3,
+                 backoff_factor=0.3, backoff_jitter=0.3, timeouts=None,
+                 default_timeout=DEFAULT_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.timeouts = {**HOST_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self._slots = {}
+        self._lock = threading.Lock()
+
+        retry = _CountingRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            other=0,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout_for(self, host):
+        if host in self.timeouts:
+            return self.timeouts[host]
+        for pattern, timeout in self.timeouts.items():
+            if pattern.startswith(".") and host.endswith(pattern):
+                return timeout
+        return self.default_timeout
+
+    def _slot(self, host):
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.max_concurrency)
+            return slot
+
+    def request(self, method, url, **kwargs):
+        host = urlparse(url).hostname or ""
+        timeout = kwargs.pop("timeout", None) or self.timeout_for(host)
+        connect_timeout = timeout[0] if isinstance(timeout, tuple) else timeout
+
+        slot = self._slot(host)
+        if not slot.acquire(timeout=connect_timeout):
+            raise OutboundBusy(f"{self.max_concurrency} requests to {host} already in flight")
+        try:
+            outbound_requests.inc(host=host)
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+        finally:
+            slot.release()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+class MailjetClient:
+    """Mailjet's v3.1 send API over an OutboundHTTP session.
+
+    mailjet_rest posts with module-level requests calls, a fresh TLS
+    connection per email; this keeps them on the shared pool.
+    """
+
+    def __init__(self, http, api_key, api_secret, base_url="https://api.mailjet.com/v3.1"):
+        self.http = http
+        self.auth = (api_key, api_secret)
+        self.base_url = base_url
+
+    def send(self, data):
+        return self.http.post(f"{self.base_url}/send", json=data, auth=self.auth)
@@ -0,0 +1,74 @@
+import time
+from datetime import timezone
+
+from auth_cache import TTLCache
+
+# what the payment page and its validation read from a product
+PAYMENT_FIELDS = {
+    "wallet": 1,
+    "price": 1,
+    "currency": 1,
+    "commission": 1,
+    "expires_at": 1,
+    "title": 1,
+    "description": 1,
+    "image": 1,
+    "image_variants": 1,
+}
+
+
+class ProductCache:
+    """Read-through cache of products for the public payment page.
+
+    Entries live `ttl` seconds but never past the product's expires_at, so
+    an expired product is always re-read (and answered 410). Writes in this
+    process invalidate their ids; other workers catch up within `ttl`.
+    Missing products are cached too, a dead link is hit as often as a
+    live one.
+    """
+
+    def __init__(self, products, ttl=30, maxsize=10000):
+        self.products = products
+        self.ttl = ttl
+        self.cache = TTLCache(maxsize)
+        self._missing = object()
+
+    def get(self, product_id):
+        product = self.cache.get(product_id, self._missing)
+        if product is not self._missing:
+            return product
+
+        product = self.products.find_one({"_id": product_id}, PAYMENT_FIELDS)
+        self._store(product_id, product)
+        return product
+
+    def _store(self, product_id, product):
+        expires = time.time() + self.ttl
+        expires_at = product.get("expires_at") if product else None
+        if expires_at is not None:
+            expires = min(expires, _timestamp(expires_at))
+        self.cache.put(product_id, product, expires)
+
+    def invalidate(self, *product_ids):
+        for product_id in product_ids:
+            self.cache.invalidate(product_id)
+
+
+class AsyncProductCache(ProductCache):
+    """ProductCache over a motor collection, for the ASGI server."""
+
+    async def get(self, product_id):
+        product = self.cache.get(product_id, self._missing)
+        if product is not self._missing:
+            return product
+
+        product = await self.products.find_one({"_id": product_id}, PAYMENT_FIELDS)
+        self._store(product_id, product)
+        return product
+
+
+def _timestamp(dt):
+    # stored datetimes are naive UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
@@ -0,0 +1,140 @@
+import base64
+import json
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from storage import pick_image_variant
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, product_id):
+    raw = json.dumps({"c": created_at.isoformat(), "id": str(product_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(raw["c"]), ObjectId(raw["id"])
+    except Exception as e:
+        raise InvalidCursor(str(e)) from e
+
+
+class ProductListing:
+    """Keyset-paginated product pages for one wallet, newest first.
+
+    Pages are ordered by (created_at, _id) descending and served from the
+    {wallet, created_at, _id} index. Dates are formatted by the aggregation
+    and transactions are only loaded when asked for, with one query for the
+    whole page.
+    """
+
+    def __init__(self, products, tx_store):
+        self.products = products
+        self.tx_store = tx_store
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports this module for its queries
+            from indexes import create_indexes
+
+            create_indexes(self.products, "products")
+            self._index_ready = True
+
+    @staticmethod
+    def pipeline(wallet, limit, cursor=None, include_transactions=False):
+        match = {"wallet": wallet}
+        if cursor:
+            created_at, product_id = decode_cursor(cursor)
+            match["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": product_id}},
+            ]
+
+        stats = {
+            "status": "$stats.status",
+            "count": {"$ifNull": ["$stats.count", 0]},
+            "confirmed_count": {"$ifNull": ["$stats.confirmed_count", 0]},
+        }
+        if include_transactions:
+            # products not yet migrated still carry the embedded array
+            stats["transactions"] = {"$ifNull": ["$stats.transactions", []]}
+
+        return [
+            {"$match": match},
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$limit": limit + 1},
+            {"$project": {
+                "wallet": 1,
+                "title": 1,
+                "description": 1,
+                "price": 1,
+                "currency": 1,
+                "image": 1,
+                "image_variants": 1,
+                "expires_at": 1,
+                "commission": 1,
+                "final_price": 1,
+                "created_ts": "$created_at",
+                "created_at": {"$cond": [
+                    {"$eq": [{"$type": "$created_at"}, "date"]},
+                    {"$dateToString": {"format": "%d.%m.%Y", "date": "$created_at"}},
+                    {"$dateToString": {
+                        "format": "%d.%m.%Y",
+                        "date": {"$dateFromString": {
+                            "dateString": {"$toString": "$created_at"},
+                            "onError": None,
+                        }},
+                        "onNull": {"$toString": "$created_at"},
+                    }},
+                ]},
+                "stats": stats,
+            }},
+        ]
+
+    def page(self, wallet, limit=DEFAULT_LIMIT, cursor=None,
+             include_transactions=False, image_width=None):
+        """Return (products, next_cursor).
+
+        `image` is the smallest stored variant at least `image_width` px wide.
+        """
+        self.ensure_indexes()
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        items = list(self.products.aggregate(
+            self.pipeline(wallet, limit, cursor, include_transactions)
+        ))
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            if isinstance(last.get("created_ts"), datetime):
+                next_cursor = encode_cursor(last["created_ts"], last["_id"])
+
+        if include_transactions:
+            stored = self.tx_store.for_products([item["_id"] for item in items])
+            for item in items:
+                known = {tx.get("hash") for tx in item["stats"]["transactions"]}
+                item["stats"]["transactions"] += [
+                    tx for tx in stored.get(item["_id"], []) if tx["hash"] not in known
+                ]
+
+        result = []
+        for item in items:
+            item.pop("created_ts", None)
+            item["id"] = str(item.pop("_id"))
+            item["image"] = pick_image_variant(item, image_width)
+            item.pop("image_variants", None)
+            result.append(item)
+
+        return result, next_cursor
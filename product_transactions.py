@@ -0,0 +1,190 @@
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from seller_stats import rollup_update, sale_fields
+
+
+class DuplicateTransaction(Exception):
+    pass
+
+
+def _parse_iso(value):
+    try:
+        return datetime.fromisoformat(value.rstrip("Z"))
+    except Exception:
+        return None
+
+
+# applied to the product once per recorded transaction
+PRODUCT_USED_UPDATE = {
+    "$set": {"stats.status": "used"},
+    "$inc": {"stats.count": 1},
+}
+
+
+def legacy_hash_query(product_id, tx_hash):
+    """Matches the product while the hash is still in its embedded array.
+
+    Products not yet migrated by migrate_embedded keep their transactions
+    in stats.transactions, out of reach of the unique index.
+    """
+    return {"_id": product_id, "stats.transactions.hash": tx_hash}
+
+
+FOR_PRODUCTS_SORT = [("product_id", 1), ("created_at", 1)]
+
+
+def for_products_query(product_ids):
+    return {"product_id": {"$in": list(product_ids)}}
+
+
+def new_transaction(product_id, tx_hash, buyer_consents, **extra):
+    doc = {
+        "hash": tx_hash,
+        "product_id": product_id,
+        "buyer_consents": buyer_consents,
+        "created_at": datetime.utcnow(),
+    }
+    doc.update(extra)
+    return doc
+
+
+class TransactionStore:
+    """Product transactions, one document per tx hash.
+
+    Replaces the unbounded stats.transactions array embedded in products.
+    The unique index on `hash` makes recording idempotent, and the product
+    only gets an atomic $inc on stats.count. With `stats` (a SellerStats)
+    every recorded sale is also counted in the seller's daily rollup.
+    """
+
+    def __init__(self, transactions, products, stats=None):
+        self.transactions = transactions
+        self.products = products
+        self.stats = stats
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports this module for its queries
+            from indexes import create_indexes
+
+            create_indexes(self.transactions, "transactions")
+            self._index_ready = True
+
+    def record(self, product_id, tx_hash, buyer_consents, **extra):
+        """Store a transaction and count it on the product.
+
+        Raises DuplicateTransaction when the hash is already recorded.
+        """
+        self.ensure_indexes()
+        if self.products.find_one(legacy_hash_query(product_id, tx_hash), {"_id": 1}):
+            raise DuplicateTransaction(tx_hash)
+        doc = new_transaction(product_id, tx_hash, buyer_consents, **extra)
+
+        try:
+            self.transactions.insert_one(doc)
+        except DuplicateKeyError:
+            raise DuplicateTransaction(tx_hash)
+
+        self.products.update_one({"_id": product_id}, PRODUCT_USED_UPDATE)
+        if self.stats:
+            self.stats.add(doc)
+        return doc
+
+    def for_products(self, product_ids):
+        """Map product _id -> [{"hash", "buyer_consents", "verification"}], oldest first."""
+        grouped = {pid: [] for pid in product_ids}
+        if not product_ids:
+            return grouped
+
+        cursor = self.transactions.find(
+            for_products_query(product_ids),
+            {"_id": 0, "product_id": 1, "hash": 1, "buyer_consents": 1, "verification": 1}
+        ).sort(FOR_PRODUCTS_SORT)
+
+        for tx in cursor:
+            grouped.setdefault(tx.pop("product_id"), []).append(tx)
+        return grouped
+
+    def migrate_embedded(self, batch_size=100):
+        """Move stats.transactions arrays into the collection.
+
+        Safe to re-run: hashes that already exist are skipped, and each
+        product loses its embedded array only after its rows are stored.
+        """
+        self.ensure_indexes()
+        moved = 0
+        migrated_products = 0
+
+        while True:
+            batch = list(self.products.find(
+                {"stats.transactions": {"$exists": True}},
+                {"_id": 1, "wallet": 1, "price": 1, "currency": 1, "commission": 1,
+                 "created_at": 1, "stats.transactions": 1}
+            ).limit(batch_size))
+            if not batch:
+                break
+
+            for product in batch:
+                docs = []
+                for tx in product.get("stats", {}).get("transactions", []):
+                    if not isinstance(tx, dict) or not tx.get("hash"):
+                        continue
+                    consents = tx.get("buyer_consents") or {}
+                    times = [t for t in map(_parse_iso, consents.values()) if t]
+                    docs.append({
+                        "hash": tx["hash"],
+                        "product_id": product["_id"],
+                        "buyer_consents": consents,
+                        "created_at": min(times) if times else product.get("created_at"),
+                        **sale_fields(product),
+                    })
+
+                if docs:
+                    try:
+                        result = self.transactions.insert_many(docs, ordered=False)
+                        moved += len(result.inserted_ids)
+                    except BulkWriteError as e:
+                        errors = e.details.get("writeErrors", [])
+                        if any(err.get("code") != 11000 for err in errors):
+                            raise
+                        moved += e.details.get("nInserted", 0)
+
+                self.products.update_one(
+                    {"_id": product["_id"]},
+                    {"$unset": {"stats.transactions": ""}}
+                )
+                migrated_products += 1
+
+        return {"products": migrated_products, "transactions": moved}
+
+
+class AsyncTransactionStore:
+    """TransactionStore.record for motor collections.
+
+    Indexes are left to TransactionStore / the index bootstrap, the async
+    server only records. `rollups` is the seller_stats collection.
+    """
+
+    def __init__(self, transactions, products, rollups=None):
+        self.transactions = transactions
+        self.products = products
+        self.rollups = rollups
+
+    async def record(self, product_id, tx_hash, buyer_consents, **extra):
+        if await self.products.find_one(legacy_hash_query(product_id, tx_hash), {"_id": 1}):
+            raise DuplicateTransaction(tx_hash)
+        doc = new_transaction(product_id, tx_hash, buyer_consents, **extra)
+
+        try:
+            await self.transactions.insert_one(doc)
+        except DuplicateKeyError:
+            raise DuplicateTransaction(tx_hash)
+
+        await self.products.update_one({"_id": product_id}, PRODUCT_USED_UPDATE)
+        if self.rollups is not None and doc.get("seller_wallet"):
+            query, update = rollup_update(doc)
+            await self.rollups.update_one(query, update, upsert=True)
+        return doc
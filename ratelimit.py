@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+import metrics
+
+rate_limit_checks = metrics.REGISTRY.counter(
+    "rate_limit_checks_total", "Requests checked against a rate limit", ("route",)
+)
+rate_limited = metrics.REGISTRY.counter(
+    "rate_limited_total", "Requests rejected by a rate limit", ("route", "scope")
+)
+
+
+class Limit:
+    """Token bucket budget: `burst` requests at once, refilled at `per_minute`."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+
+    def __repr__(self):
+        return f"Limit(per_minute={self.rate * 60:g}, burst={self.burst})"
+
+
+# route -> scope -> budget, overridable per entry with
+# RATE_LIMIT_<ROUTE>_<SCOPE>=<per minute>/<burst>, e.g. RATE_LIMIT_CREATE_PRODUCT_WALLET=10/5
+# Only routes that know the wallet from a verified token get a wallet
+# scope; a wallet named in the body would let anyone spend another
+# wallet's budget.
+DEFAULT_LIMITS = {
+    "auth_wallet": {"ip": Limit(30, 10)},
+    "create_product": {"wallet": Limit(10, 5), "ip": Limit(30, 10)},
+    "prepare_sol": {"ip": Limit(120, 40)},
+    "send_receipt": {"ip": Limit(20, 10)},
+}
+
+
+def parse_limit(value):
+    """Limit from "<per minute>/<burst>", ValueError if it isn't one."""
+    per_minute, burst = value.split("/")
+    per_minute, burst = float(per_minute), int(burst)
+    if not math.isfinite(per_minute) or per_minute <= 0 or burst < 1:
+        raise ValueError(f"invalid limit {value!r}")
+    return Limit(per_minute, burst)
+
+
+def limits_from_env(environ, defaults=DEFAULT_LIMITS):
+    """Budgets with environment overrides applied, {} when RATE_LIMITS_ENABLED=0."""
+    if environ.get("RATE_LIMITS_ENABLED", "1") == "0":
+        return {}
+
+    limits = {}
+    for route, budgets in defaults.items():
+        limits[route] = {}
+        for scope, limit in budgets.items():
+            name = f"RATE_LIMIT_{route.upper()}_{scope.upper()}"
+            override = environ.get(name)
+            if override:
+                try:
+                    limit = parse_limit(override)
+                except ValueError:
+                    print(f"⚠️ Ignoring {name}={override!r}, expected <per minute>/<burst>; using {limit}")
+            limits[route][scope] = limit
+    return limits
+
+
+class MemoryBucketStore:
+    """Token buckets in this process, least recently used dropped past maxsize.
+
+    A dropped bucket comes back full, which only ever errs towards allowing.
+    """
+
+    shared = False
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, now=None):
+        """Take one token, returns 0 when allowed or seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class MongoBucketStore:
+    """Token buckets shared by every process, one document per key.
+
+    Refill and take happen in a single pipeline update, so concurrent
+    requests from different workers can't both spend the last token.
+    Idle buckets are removed by a TTL index on expires_at.
+    """
+
+    shared = True
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports every model module, keep those out of asgi.py
+            from indexes import create_indexes
+
+            create_indexes(self.collection, "rate_limits")
+            self._index_ready = True
+
+    def take(self, key, limit, now=None):
+        self.ensure_indexes()
+        now = now or datetime.utcnow()
+        refilled = {"$min": [limit.burst, {"$add": [
+            {"$ifNull": ["$tokens", limit.burst]},
+            {"$multiply": [
+                {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]},
+                limit.rate,
+            ]},
+        ]}]}
+        # a bucket that sat idle long enough to refill is as good as absent
+        idle = timedelta(seconds=limit.burst / limit.rate)
+
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now, "expires_at": now + idle}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [
+                        {"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"
+                    ]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return 0
+        return (1 - doc["tokens"]) / limit.rate
+
+
+class RateLimiter:
+    """Per-route token bucket budgets, keyed by wallet and by client IP.
+
+    `limits` maps a route name to {"wallet": Limit, "ip": Limit}; either
+    scope can be left out. A request must get a token from every bucket
+    that applies to it.
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+
+    def check(self, route, wallet=None, ip=None):
+        """Seconds to wait before retrying, or None when the request may go ahead."""
+        budgets = self.limits.get(route)
+        if not budgets:
+            return None
+
+        rate_limit_checks.inc(route=route)
+        for scope, value in (("wallet", wallet), ("ip", ip)):
+            limit = budgets.get(scope)
+            if limit is None or not value:
+                continue
+            try:
+                wait = self.store.take(f"{route}:{scope}:{value}", limit)
+            except Exception as e:
+                # a broken shared store must not take the routes down with it
+                print(f"Rate limit store error: {e}")
+                return None
+            if wait:
+                rate_limited.inc(route=route, scope=scope)
+                return wait
+        return None
+
+    def stats(self):
+        return {
+            "store": type(self.store).__name__,
+            "limits": {
+                route: {scope: repr(limit) for scope, limit in budgets.items()}
+                for route, budgets in self.limits.items()
+            },
+        }
+
+
+def retry_after_header(wait):
+    return str(max(1, math.ceil(wait)))
@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from "react";
 import { useWalletAuth } from "./WalletAuthContext";
 import Notification from "./Notification";
 import TermsConsentModal from "./TermsConsentModal";
+import { imageUploadFields, uploadProductImage } from "./imageUpload";
 
 export default function CreateSection() {
   const { token } = useWalletAuth();
@@ -230,18 +231,20 @@ const handleSubmit = async (e) => {
     if (!amlFromDB) await submitConsent("aml");
     if (!disclaimerFromDB) await submitConsent("platform_disclaimer");
 
-    const formData = new FormData();
-    formData.append("image", image);
-    formData.append("title", title);
-    formData.append("description", description);
-    formData.append("price", numPrice.toFixed(3));
-    formData.append("currency", currency);
-    formData.append("duration", duration);
-
     const res = await fetch(`${BACKEND}/create_product`, {
       method: "POST",
-      headers: { Authorization: `Bearer ${token}` },
-      body: formData,
+      headers: {
+        Authorization: `Bearer ${token}`,
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        title,
+        description,
+        price: numPrice.toFixed(3),
+        currency,
+        duration,
+        ...imageUploadFields(image),
+      }),
     });
 
     const data = await res.json();
@@ -249,6 +252,8 @@ const handleSubmit = async (e) => {
       throw new Error(data.message || "Error creating product.");
     }
 
+    await uploadProductImage(BACKEND, token, data.product_id, data.upload, image);
+
 
     setNotification("Product created successfully!");
     handleRemoveImage();
@@ -314,7 +319,7 @@ const needsConsent = consentsLoaded && (!amlFromDB || !disclaimerFromDB);
     />
   )}
 
-  <form className="create-form" onSubmit={handleSubmit} encType="multipart/form-data">
+  <form className="create-form" onSubmit={handleSubmit}>
     <p className="warning-text">
       Warning: All entered data will be lost if you leave this page!
     </p>
@@ -338,7 +343,7 @@ const needsConsent = consentsLoaded && (!amlFromDB || !disclaimerFromDB);
       <input
         ref={fileInputRef}
         type="file"
-        accept="image/*"
+        accept="image/jpeg,image/png,image/webp,image/gif"
         onChange={handleImageChange}
         disabled={maxProductsReached}
         required
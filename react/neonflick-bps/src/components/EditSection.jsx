@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { useWalletAuth } from "./WalletAuthContext";
 import Notification from "./Notification";
+import { imageUploadFields, uploadProductImage } from "./imageUpload";
 
 export default function EditSection({ product, onCancel }) {
   const { token } = useWalletAuth();
@@ -107,18 +108,15 @@ const handleSubmit = async (e) => {
     return;
   }
 
-  // ---------- BUILD FORM DATA ----------
-  const formData = new FormData();
-  formData.append("id", product.id);
-  formData.append("title", title.trim());
-  formData.append("description", description.trim());
-  formData.append("price", numPrice.toFixed(3));
-  formData.append("currency", currency);
-
-  if (image) {
-    formData.append("image", image);
-    formData.append("old_image", product.image || "");
-  }
+  // ---------- BUILD REQUEST ----------
+  const body = {
+    id: product.id,
+    title: title.trim(),
+    description: description.trim(),
+    price: numPrice.toFixed(3),
+    currency,
+    ...(image ? imageUploadFields(image) : {}),
+  };
 
   setLoading(true);
 
@@ -126,8 +124,11 @@ const handleSubmit = async (e) => {
   try {
     const res = await fetch(`${BACKEND}/update_product`, {
       method: "POST",
-      headers: { Authorization: `Bearer ${token}` },
-      body: formData,
+      headers: {
+        Authorization: `Bearer ${token}`,
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(body),
     });
 
     const data = await res.json();
@@ -136,6 +137,10 @@ const handleSubmit = async (e) => {
       throw new Error(data.message || "Product update failed.");
     }
 
+    if (data.upload) {
+      await uploadProductImage(BACKEND, token, product.id, data.upload, image);
+    }
+
     // ---------- SUCCESS ----------
     setNotification("Product updated successfully!");
     onCancel(); // close modal / reset form
@@ -160,7 +165,7 @@ const handleSubmit = async (e) => {
     <Notification message={notification} onClose={() => setNotification("")} />
   )}
 
-  <form className="create-form" onSubmit={handleSubmit} encType="multipart/form-data">
+  <form className="create-form" onSubmit={handleSubmit}>
     <p className="edit-warning-text">
       Warning: All entered data will be lost if you leave this page!
     </p>
@@ -179,7 +184,7 @@ const handleSubmit = async (e) => {
       <input
         ref={fileInputRef}
         type="file"
-        accept="image/*"
+        accept="image/jpeg,image/png,image/webp,image/gif"
         onChange={handleImageChange}
       />
       <span className="file-name">{image ? image.name : "Upload image"}</span>
@@ -38,7 +38,7 @@ export default function ProductsSection({ onEdit }) {
   setLoading(true);
   try {
     const token = localStorage.getItem("jwt_token");
-    const res = await fetch(`${BACKEND}/products`, {
+    const res = await fetch(`${BACKEND}/products?include=transactions`, {
       headers: token ? { Authorization: `Bearer ${token}` } : {},
     });
 
@@ -0,0 +1,29 @@
+// Direct-to-S3 image upload: the backend hands out a presigned POST,
+// the file goes straight to S3, then the backend checks it and attaches it.
+
+export const imageUploadFields = (file) => ({
+  image_type: file.type,
+  image_size: file.size,
+  image_name: file.name,
+});
+
+export async function uploadProductImage(backend, token, productId, upload, file) {
+  const form = new FormData();
+  Object.entries(upload.fields).forEach(([key, value]) => form.append(key, value));
+  form.append("file", file);
+
+  const s3Res = await fetch(upload.url, { method: "POST", body: form });
+  if (!s3Res.ok) {
+    throw new Error("Image upload failed. Images must be JPEG, PNG, WebP or GIF up to 10 MB.");
+  }
+
+  const res = await fetch(`${backend}/products/${productId}/image/finalize`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  const data = await res.json();
+  if (!res.ok) {
+    throw new Error(data.message || "Image upload failed.");
+  }
+  return data;
+}
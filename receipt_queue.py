@@ -0,0 +1,176 @@
+import random
+import threading
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+PENDING_STATUSES = ["queued", "retry"]
+
+CLAIM_SORT = [("next_attempt_at", 1)]
+
+
+def claimable_query(now):
+    """Jobs due for an attempt, or held by a worker whose lease ran out."""
+    return {"$or": [
+        {"status": {"$in": PENDING_STATUSES}, "next_attempt_at": {"$lte": now}},
+        {"status": "processing", "locked_until": {"$lte": now}},
+    ]}
+
+
+class ReceiptQueue:
+    """Durable receipt jobs stored in Mongo and drained by worker threads.
+
+    One job per tx_hash. Workers claim jobs with find_one_and_update so any
+    number of processes can drain the same queue; a claim is a lease, and a
+    job whose worker died becomes claimable again after `lease` seconds.
+    Failures are retried with exponential backoff up to `max_attempts`.
+    """
+
+    def __init__(self, jobs, handler, workers=4, max_attempts=5,
+                 base_delay=10, max_delay=600, lease=120, poll_interval=2):
+        self.jobs = jobs
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports this module for its queries
+            from indexes import create_indexes
+
+            create_indexes(self.jobs, "receipt_jobs")
+            self._index_ready = True
+
+    # ---------- producers ----------
+    def enqueue(self, tx_hash, payload):
+        """Queue a receipt, returns (job_id, created)."""
+        self.ensure_indexes()
+        now = datetime.utcnow()
+
+        try:
+            job_id = self.jobs.insert_one({
+                "tx_hash": tx_hash,
+                "payload": payload,
+                "status": "queued",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }).inserted_id
+        except DuplicateKeyError:
+            # a permanently failed receipt may be requested again
+            requeued = self.jobs.find_one_and_update(
+                {"tx_hash": tx_hash, "status": "failed"},
+                {"$set": {
+                    "payload": payload,
+                    "status": "queued",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "updated_at": now,
+                }},
+                projection={"_id": 1},
+            )
+            if requeued:
+                self._wakeup.set()
+                return str(requeued["_id"]), True
+
+            job = self.jobs.find_one({"tx_hash": tx_hash}, {"_id": 1})
+            return str(job["_id"]), False
+
+        self._wakeup.set()
+        return str(job_id), True
+
+    def get(self, job_id):
+        try:
+            oid = ObjectId(job_id)
+        except Exception:
+            return None
+        return self.jobs.find_one({"_id": oid}, {"payload": 0})
+
+    def depth(self):
+        return self.jobs.count_documents({"status": {"$in": PENDING_STATUSES}})
+
+    # ---------- workers ----------
+    def claim(self):
+        now = datetime.utcnow()
+        return self.jobs.find_one_and_update(
+            claimable_query(now),
+            {
+                "$set": {
+                    "status": "processing",
+                    "locked_until": now + timedelta(seconds=self.lease),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=CLAIM_SORT,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def process(self, job):
+        now = datetime.utcnow()
+        try:
+            self.handler(job["payload"])
+        except Exception as e:
+            attempts = job.get("attempts", 1)
+            if attempts >= self.max_attempts:
+                update = {"status": "failed"}
+                print(f"❌ Receipt {job['_id']} failed permanently: {e}")
+            else:
+                update = {
+                    "status": "retry",
+                    "next_attempt_at": now + timedelta(seconds=self.backoff(attempts)),
+                }
+            update.update({"last_error": str(e), "updated_at": now})
+            self.jobs.update_one({"_id": job["_id"]}, {"$set": update})
+            return False
+
+        self.jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "sent", "sent_at": now, "updated_at": now},
+             "$unset": {"locked_until": "", "last_error": ""}}
+        )
+        return True
+
+    def _work_forever(self):
+        while True:
+            try:
+                job = self.claim()
+            except Exception as e:
+                print(f"Receipt queue error: {e}")
+                job = None
+
+            if job:
+                try:
+                    self.process(job)
+                    continue
+                except Exception as e:
+                    # the job is retried once its lease runs out
+                    print(f"Receipt queue error on {job['_id']}: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._threads:
+            return
+        self.ensure_indexes()
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._work_forever, daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"🔥 Receipt workers started ({self.workers})")
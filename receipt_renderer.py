@@ -0,0 +1,216 @@
+import io
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlparse
+
+CYAN = (0, 255, 255)
+WHITE = (255, 255, 255)
+
+IMG_WIDTH_MM, IMG_HEIGHT_MM = 100, 60
+LABEL_WIDTH = 55
+
+TITLE = "Electronic Payment Receipt"
+FOOTER = "Powered by Neonflick-bps - Blockchain transaction record"
+
+# (font style, font size, line height, spacing after, text)
+LEGAL_PARAGRAPHS = [
+    ("", 11, 7, 3, "This document is provided for informational purposes only and serves as a record of a completed blockchain transaction. It does not constitute a legal agreement, contract, or proof of consent between the parties."),
+    ("I", 10, 6, 4, "User acknowledgements and consent selections are collected separately via the platform interface at the time of payment and may be stored in platform systems for audit or compliance purposes."),
+    ("", 10, 6, 8, "Cryptocurrency transactions are irreversible and may involve technical or market risks. Users are responsible for reviewing all applicable platform documentation prior to initiating a transaction."),
+]
+
+
+def image_cache_key(image_url):
+    """Host and S3 key of a product image URL, used to share cached images."""
+    parsed = urlparse(image_url)
+    return f"{parsed.netloc}{parsed.path}" or image_url
+
+
+class ImageCache:
+    """LRU of downscaled product images, bounded by total bytes."""
+
+    def __init__(self, fetch, max_bytes=32 * 1024 * 1024, max_px=(600, 360), quality=80):
+        self.fetch = fetch
+        self.max_bytes = max_bytes
+        self.max_px = max_px
+        self.quality = quality
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, raw):
+        from PIL import Image
+
+        img = Image.open(io.BytesIO(raw))
+        img.thumbnail(self.max_px)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=self.quality, optimize=True)
+        return out.getvalue()
+
+    def get(self, image_url):
+        key = image_cache_key(image_url)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self.prepare(self.fetch(image_url))
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class ReceiptRenderer:
+    """Receipt PDFs with the static layout worked out once.
+
+    Text wrapping of the fixed legal paragraphs is the most expensive part
+    of the layout, so their lines are computed at construction and each
+    receipt only emits them (ragged right, cell() can't justify a single
+    line). Product images come from the ImageCache.
+    """
+
+    def __init__(self, image_cache=None):
+        self.image_cache = image_cache
+        self._legal_lines = None
+
+    @property
+    def legal_lines(self):
+        # wrapped on first use, fpdf is only imported once a receipt is made
+        if self._legal_lines is None:
+            self._legal_lines = self._wrap_legal()
+        return self._legal_lines
+
+    def _new_pdf(self):
+        from fpdf import FPDF
+
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_fill_color(0, 0, 0)
+        pdf.rect(0, 0, pdf.w, pdf.h, "F")
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_draw_color(*CYAN)
+        return pdf
+
+    def _wrap_legal(self):
+        pdf = self._new_pdf()
+        wrapped = []
+        for style, size, line_h, after, text in LEGAL_PARAGRAPHS:
+            pdf.set_font("Helvetica", style=style, size=size)
+            lines = pdf.multi_cell(0, line_h, text, dry_run=True, output="LINES")
+            wrapped.append((style, size, line_h, after, lines))
+        return wrapped
+
+    def _header(self, pdf):
+        from fpdf.enums import XPos, YPos
+
+        pdf.set_text_color(*CYAN)
+        pdf.set_font("Helvetica", style="B", size=18)
+        pdf.cell(0, 12, TITLE, align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(6)
+        pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+        pdf.ln(8)
+
+    def _image(self, pdf, image_url):
+        if not self.image_cache or not image_url:
+            return
+        try:
+            img = self.image_cache.get(image_url)
+        except Exception:
+            return
+        x_pos = (pdf.w - IMG_WIDTH_MM) / 2
+        y_pos = pdf.get_y()
+        pdf.image(io.BytesIO(img), x=x_pos, y=y_pos, w=IMG_WIDTH_MM, h=IMG_HEIGHT_MM)
+        pdf.rect(x_pos, y_pos, IMG_WIDTH_MM, IMG_HEIGHT_MM)
+        pdf.ln(IMG_HEIGHT_MM + 6)
+
+    def _rows(self, pdf, data):
+        from fpdf.enums import XPos, YPos
+
+        value_width = pdf.w - 2 * pdf.l_margin - LABEL_WIDTH
+        rows = [
+            ("Receipt Date:", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")),
+            ("Product:", data["title"]),
+            ("Amount Paid:", f"{data['price']} {data['currency']}"),
+            ("Buyer Wallet:", data["buyer_wallet"]),
+            ("Seller Wallet:", data["sellerWallet"]),
+            ("Transaction Hash:", data["tx_hash"]),
+        ]
+        if data.get("commission"):
+            rows.append((
+                "Platform Commission:",
+                f"{data['commission']} {data['currency']} (paid by seller)"
+            ))
+
+        for label, value in rows:
+            pdf.set_text_color(*CYAN)
+            pdf.set_font("Helvetica", style="B", size=12)
+            pdf.cell(LABEL_WIDTH, 8, label, new_x=XPos.RIGHT, new_y=YPos.TOP)
+            pdf.set_text_color(*WHITE)
+            pdf.set_font("Helvetica", size=12)
+            value = str(value)
+            if pdf.get_string_width(value) <= value_width - 2 * pdf.c_margin:
+                # single line: skip multi_cell's line breaking
+                pdf.cell(value_width, 8, value, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            else:
+                pdf.multi_cell(value_width, 8, value)
+            pdf.ln(2)
+
+    def _legal(self, pdf):
+        from fpdf.enums import XPos, YPos
+
+        pdf.ln(4)
+        pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+        pdf.ln(6)
+
+        pdf.set_text_color(*WHITE)
+        for style, size, line_h, after, lines in self.legal_lines:
+            pdf.set_font("Helvetica", style=style, size=size)
+            for line in lines:
+                pdf.cell(0, line_h, line, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.ln(after)
+
+        pdf.set_text_color(*CYAN)
+        pdf.set_font("Helvetica", style="I", size=9)
+        pdf.cell(0, 6, FOOTER, align="C")
+
+    def render(self, data):
+        pdf = self._new_pdf()
+        self._header(pdf)
+        self._image(pdf, data.get("image"))
+        self._rows(pdf, data)
+        self._legal(pdf)
+
+        out = io.BytesIO()
+        pdf.output(out)
+        return out.getvalue()
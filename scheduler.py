@@ -0,0 +1,155 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+def make_owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """Mongo-backed lease: one document per job, held by a single owner.
+
+    The holder extends expires_at on every heartbeat. Anyone else can take
+    the lease over only after it has expired.
+    """
+
+    def __init__(self, collection, name, owner, ttl=30):
+        self.collection = collection
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+
+    def acquire(self):
+        now = datetime.utcnow()
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"owner": self.owner},
+                        {"expires_at": {"$lte": now}}
+                    ]
+                },
+                {"$set": {
+                    "owner": self.owner,
+                    "expires_at": now + timedelta(seconds=self.ttl),
+                    "heartbeat_at": now
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # lease exists and belongs to a live owner
+            return False
+        return bool(doc) and doc.get("owner") == self.owner
+
+    def release(self):
+        self.collection.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expires_at": datetime.utcnow()}}
+        )
+
+
+class Job:
+    def __init__(self, name, func, interval):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = 0.0
+        self.last_run_at = None
+        self.last_duration = None
+        self.last_error = None
+        self.held = False
+
+
+class JobScheduler:
+    """Runs periodic jobs, each one on whichever process holds its lease."""
+
+    def __init__(self, leases, owner=None, lease_ttl=30, tick=1.0):
+        self.leases = leases
+        self.owner = owner or make_owner_id()
+        self.lease_ttl = lease_ttl
+        self.tick = tick
+        self.jobs = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def add_job(self, name, func, interval):
+        self.jobs[name] = Job(name, func, interval)
+
+    def lease_for(self, name):
+        return LeaderLease(self.leases, name, self.owner, self.lease_ttl)
+
+    def run_job(self, job):
+        started = time.monotonic()
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            print(f"Job {job.name} error: {e}")
+        job.last_duration = time.monotonic() - started
+        job.last_run_at = datetime.utcnow()
+
+    def run_pending(self):
+        now = time.monotonic()
+        for job in self.jobs.values():
+            if now < job.next_run:
+                continue
+            job.next_run = now + job.interval
+
+            job.held = self.lease_for(job.name).acquire()
+            if job.held:
+                self.run_job(job)
+
+    def heartbeat(self):
+        for job in self.jobs.values():
+            if job.held:
+                job.held = self.lease_for(job.name).acquire()
+
+    def _loop(self, step, interval):
+        while not self._stop.is_set():
+            try:
+                step()
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+            self._stop.wait(interval)
+
+    def start(self):
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(
+                target=self._loop, args=(self.run_pending, self.tick), daemon=True
+            ),
+            threading.Thread(
+                target=self._loop, args=(self.heartbeat, self.lease_ttl / 3), daemon=True
+            ),
+        ]
+        for t in self._threads:
+            t.start()
+        print(f"🔥 Job scheduler started as {self.owner}")
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        for job in self.jobs.values():
+            if job.held:
+                self.lease_for(job.name).release()
+                job.held = False
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+
+from pymongo import ReplaceOne
+
+from commission import lamports_to_sol, sol_to_lamports
+
+# longest range a single /products/stats request may cover
+MAX_RANGE_DAYS = 366
+
+
+def sale_fields(product):
+    """What a transaction records about the sale, so rollups never need the product.
+
+    Amounts are in base units (lamports for SOL).
+    """
+    return {
+        "seller_wallet": product.get("wallet"),
+        "currency": str(product.get("currency") or "SOL").upper(),
+        "amount": sol_to_lamports(product.get("price") or 0),
+        "commission": sol_to_lamports(product.get("commission") or 0),
+    }
+
+
+def day_of(ts):
+    return datetime(ts.year, ts.month, ts.day)
+
+
+def rollup_key(tx):
+    return {
+        "wallet": tx["seller_wallet"],
+        "day": day_of(tx["created_at"]),
+        "currency": tx.get("currency") or "SOL",
+    }
+
+
+RANGE_SORT = [("day", 1)]
+
+
+def range_query(wallet, start, end):
+    """A wallet's rollups for days start..end inclusive."""
+    return {"wallet": wallet, "day": {"$gte": day_of(start), "$lte": day_of(end)}}
+
+
+def rollup_update(tx):
+    """(filter, update) counting one recorded sale in its day's rollup."""
+    return rollup_key(tx), {
+        "$inc": {
+            "sales": 1,
+            "gross": tx.get("amount", 0),
+            "commission": tx.get("commission", 0),
+        },
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+
+
+class SellerStats:
+    """Per-wallet, per-day sales rollups in the seller_stats collection.
+
+    One document per (wallet, day, currency) holding the number of sales
+    and the gross and commission amounts in base units (lamports for SOL),
+    bumped with $inc as transactions are recorded. A dashboard reads one
+    document per day instead of every transaction, and the totals outlive
+    the products, which the expiry sweep deletes.
+    """
+
+    def __init__(self, rollups, transactions, products):
+        self.rollups = rollups
+        self.transactions = transactions
+        self.products = products
+
+    def add(self, tx):
+        if not tx.get("seller_wallet"):
+            return
+        query, update = rollup_update(tx)
+        self.rollups.update_one(query, update, upsert=True)
+
+    def for_wallet(self, wallet, start, end):
+        """Daily rows and per-currency totals for days start..end inclusive."""
+        cursor = self.rollups.find(
+            range_query(wallet, start, end),
+            {"_id": 0, "day": 1, "currency": 1, "sales": 1, "gross": 1, "commission": 1}
+        ).sort(RANGE_SORT)
+
+        days = []
+        totals = {}
+        for doc in cursor:
+            gross = doc.get("gross", 0)
+            commission = doc.get("commission", 0)
+            days.append({
+                "day": doc["day"].date().isoformat(),
+                "currency": doc["currency"],
+                "sales": doc.get("sales", 0),
+                "revenue": lamports_to_sol(gross),
+                "commission": lamports_to_sol(commission),
+                "net": lamports_to_sol(gross - commission),
+            })
+
+            total = totals.setdefault(doc["currency"], {"sales": 0, "gross": 0, "commission": 0})
+            total["sales"] += doc.get("sales", 0)
+            total["gross"] += gross
+            total["commission"] += commission
+
+        return days, {
+            currency: {
+                "sales": t["sales"],
+                "revenue": lamports_to_sol(t["gross"]),
+                "commission": lamports_to_sol(t["commission"]),
+                "net": lamports_to_sol(t["gross"] - t["commission"]),
+            }
+            for currency, t in totals.items()
+        }
+
+    def rebuild(self, batch_size=1000):
+        """Recompute every rollup from the transactions collection.
+
+        Transactions recorded before sales fields existed are attributed
+        through their product; those whose product is already gone are
+        skipped. Rollups are replaced in place and ones no transaction
+        backs any more are removed. Sales recorded while this runs can be
+        overwritten, run it when traffic is low; re-running is safe.
+        """
+        started = datetime.utcnow()
+        totals = {}
+        scanned = 0
+        skipped = 0
+        legacy = []
+
+        def count(tx):
+            key = rollup_key(tx)
+            total = totals.setdefault(
+                (key["wallet"], key["day"], key["currency"]),
+                {"sales": 0, "gross": 0, "commission": 0},
+            )
+            total["sales"] += 1
+            total["gross"] += tx.get("amount", 0)
+            total["commission"] += tx.get("commission", 0)
+
+        def count_legacy():
+            nonlocal skipped
+            ids = list({tx["product_id"] for tx in legacy})
+            owners = {
+                p["_id"]: sale_fields(p)
+                for p in self.products.find(
+                    {"_id": {"$in": ids}},
+                    {"wallet": 1, "price": 1, "currency": 1, "commission": 1}
+                )
+            }
+            for tx in legacy:
+                fields = owners.get(tx["product_id"])
+                if fields and fields["seller_wallet"]:
+                    count({**tx, **fields})
+                else:
+                    skipped += 1
+            legacy.clear()
+
+        cursor = self.transactions.find(
+            {"created_at": {"$lt": started}},
+            {"_id": 0, "product_id": 1, "created_at": 1, "seller_wallet": 1,
+             "currency": 1, "amount": 1, "commission": 1}
+        ).batch_size(batch_size)
+
+        for tx in cursor:
+            scanned += 1
+            if not isinstance(tx.get("created_at"), datetime):
+                skipped += 1
+            elif tx.get("seller_wallet"):
+                count(tx)
+            else:
+                legacy.append(tx)
+                if len(legacy) >= batch_size:
+                    count_legacy()
+        count_legacy()
+
+        ops = [
+            ReplaceOne(
+                {"wallet": wallet, "day": day, "currency": currency},
+                {"wallet": wallet, "day": day, "currency": currency, **total,
+                 "updated_at": datetime.utcnow(), "rebuilt_at": started},
+                upsert=True,
+            )
+            for (wallet, day, currency), total in totals.items()
+        ]
+        for start in range(0, len(ops), batch_size):
+            self.rollups.bulk_write(ops[start:start + batch_size], ordered=False)
+
+        removed = self.rollups.delete_many({
+            "$or": [{"rebuilt_at": {"$lt": started}}, {"rebuilt_at": {"$exists": False}}],
+            "updated_at": {"$lt": started},
+        }).deleted_count
+
+        return {
+            "transactions": scanned,
+            "skipped": skipped,
+            "rollups": len(ops),
+            "removed": removed,
+        }
+
+
+def parse_range(start, end, default_days=30, today=None):
+    """(start, end) days from optional YYYY-MM-DD strings, raises ValueError."""
+    today = day_of(today or datetime.utcnow())
+    end = datetime.strptime(end, "%Y-%m-%d") if end else today
+    start = datetime.strptime(start, "%Y-%m-%d") if start else end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValueError("from must not be after to")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
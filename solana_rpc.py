@@ -0,0 +1,254 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import timed
+
+
+class SolanaRPCError(Exception):
+    pass
+
+
+class BlockhashUnavailable(Exception):
+    pass
+
+
+class SolanaRPC:
+    """Minimal JSON-RPC client over one keep-alive session.
+
+    solana-py's sync client posts every call through a fresh connection, so
+    the hot paths talk to the node through this instead.
+    """
+
+    def __init__(self, endpoint, timeout=5, pool_size=20):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def call(self, method, params=None):
+        body = _request(next(self._ids), method, params)
+        with timed("solana_rpc", method):
+            try:
+                resp = self.session.post(self.endpoint, json=body, timeout=self.timeout)
+                resp.raise_for_status()
+                data = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                raise SolanaRPCError(f"{method} failed: {e}") from e
+            return _result(method, data)
+
+    def get_latest_blockhash(self, commitment="confirmed"):
+        result = self.call("getLatestBlockhash", [{"commitment": commitment}])
+        value = result["value"]
+        return value["blockhash"], value["lastValidBlockHeight"]
+
+
+def _request(request_id, method, params):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": method,
+        "params": params or [],
+    }
+
+
+def _result(method, data):
+    if data.get("error"):
+        raise SolanaRPCError(f"{method} failed: {data['error']}")
+    return data.get("result")
+
+
+class AsyncSolanaRPC:
+    """SolanaRPC for asyncio code, over one pooled httpx.AsyncClient."""
+
+    def __init__(self, endpoint, timeout=5, pool_size=100):
+        import httpx
+
+        self.endpoint = endpoint
+        self._ids = itertools.count(1)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def call(self, method, params=None):
+        import httpx
+
+        body = _request(next(self._ids), method, params)
+        with timed("solana_rpc", method):
+            try:
+                resp = await self.client.post(self.endpoint, json=body)
+                resp.raise_for_status()
+                data = resp.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise SolanaRPCError(f"{method} failed: {e}") from e
+            return _result(method, data)
+
+    async def get_latest_blockhash(self, commitment="confirmed"):
+        result = await self.call("getLatestBlockhash", [{"commitment": commitment}])
+        value = result["value"]
+        return value["blockhash"], value["lastValidBlockHeight"]
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class BlockhashCache:
+    """Latest blockhash shared by all prepare requests in the process.
+
+    A background thread refreshes it every `refresh_interval` seconds.
+    Readers get the cached value while it is younger than `max_age`; if the
+    node is unreachable they keep getting it until `stale_max_age`, which
+    stays well inside the ~60-90 s a blockhash is accepted by the cluster.
+    """
+
+    def __init__(self, rpc, refresh_interval=5, max_age=20, stale_max_age=40):
+        self.rpc = rpc
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.stale_max_age = stale_max_age
+
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refresher = None
+
+        self.refreshes = 0
+        self.errors = 0
+
+    def age(self):
+        if self._value is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def refresh(self):
+        try:
+            value = self.rpc.get_latest_blockhash()
+        except Exception:
+            self.errors += 1
+            raise
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.monotonic()
+            self.refreshes += 1
+        return value
+
+    def get(self):
+        """Return (blockhash, last_valid_block_height)."""
+        self._ensure_refresher()
+
+        age = self.age()
+        if age is not None and age <= self.max_age:
+            return self._value
+
+        try:
+            # one caller fetches, concurrent requests wait and reuse its result
+            with self._fetch_lock:
+                age = self.age()
+                if age is not None and age <= self.max_age:
+                    return self._value
+                return self.refresh()
+        except Exception as e:
+            age = self.age()
+            if age is not None and age <= self.stale_max_age:
+                return self._value
+            raise BlockhashUnavailable(str(e)) from e
+
+    def _ensure_refresher(self):
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_forever, daemon=True)
+        self._refresher.start()
+
+    def _refresh_forever(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Blockhash refresh failed: {e}")
+            time.sleep(self.refresh_interval)
+
+
+class AsyncBlockhashCache:
+    """BlockhashCache for the asyncio server, refreshed by a background task.
+
+    Same freshness rules; concurrent misses wait on one fetch through an
+    asyncio.Lock instead of a thread lock.
+    """
+
+    def __init__(self, rpc, refresh_interval=5, max_age=20, stale_max_age=40):
+        self.rpc = rpc
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.stale_max_age = stale_max_age
+
+        self._value = None
+        self._fetched_at = 0.0
+        self._fetch_lock = asyncio.Lock()
+        self._refresher = None
+
+        self.refreshes = 0
+        self.errors = 0
+
+    def age(self):
+        if self._value is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    async def refresh(self):
+        try:
+            value = await self.rpc.get_latest_blockhash()
+        except Exception:
+            self.errors += 1
+            raise
+        self._value = value
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        return value
+
+    async def get(self):
+        """Return (blockhash, last_valid_block_height)."""
+        age = self.age()
+        if age is not None and age <= self.max_age:
+            return self._value
+
+        try:
+            async with self._fetch_lock:
+                age = self.age()
+                if age is not None and age <= self.max_age:
+                    return self._value
+                return await self.refresh()
+        except Exception as e:
+            age = self.age()
+            if age is not None and age <= self.stale_max_age:
+                return self._value
+            raise BlockhashUnavailable(str(e)) from e
+
+    def start(self):
+        if self._refresher is None:
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Blockhash refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,272 @@
+import io
+import uuid
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+
+S3_DELETE_BATCH = 1000
+
+
+def delete_s3_objects(s3, bucket, keys):
+    """Delete keys from S3 with the bulk delete_objects API.
+
+    Returns (deleted_keys, errors) where errors maps key -> message.
+    Missing keys count as deleted, S3 reports them that way too.
+    """
+    keys = [k for k in dict.fromkeys(keys) if k]
+    deleted = []
+    errors = {}
+
+    for start in range(0, len(keys), S3_DELETE_BATCH):
+        chunk = keys[start:start + S3_DELETE_BATCH]
+        try:
+            resp = s3.delete_objects(
+                Bucket=bucket,
+                Delete={
+                    "Objects": [{"Key": k} for k in chunk],
+                    "Quiet": True
+                }
+            )
+        except Exception as e:
+            for k in chunk:
+                errors[k] = str(e)
+            continue
+
+        failed = {
+            err["Key"]: err.get("Message") or err.get("Code", "delete failed")
+            for err in resp.get("Errors", [])
+        }
+        errors.update(failed)
+        deleted.extend(k for k in chunk if k not in failed)
+
+    return deleted, errors
+
+
+# resized copies made on upload, stored under image_variants[str(width)]
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+
+# marks products whose presigned upload still needs its variants
+VARIANTS_PENDING = {"variants_pending": True}
+
+# limits for images the browser uploads straight to S3
+UPLOAD_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif")
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_URL_TTL = 600
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def key_from_url(url):
+    return urlparse(url).path.lstrip("/") if url else None
+
+
+def product_image_keys(product):
+    """All S3 keys owned by a product: the original and its variants.
+
+    Older products could have `image` replaced without `s3_key` following
+    it, so the key behind the image URL is included as well, and so is a
+    presigned upload that was never finalized.
+    """
+    keys = [product.get("s3_key"), key_from_url(product.get("image"))]
+    keys.append((product.get("pending_image") or {}).get("key"))
+    keys += [v.get("key") for v in (product.get("image_variants") or {}).values()]
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+def pick_image_variant(product, width):
+    """URL of the smallest variant at least `width` px wide.
+
+    Variants are only made below the original's width, so when none is
+    wide enough the original is the best fit.
+    """
+    variants = (product.get("image_variants") or {}).values()
+    fitting = [v for v in variants if v["width"] >= (width or 0)]
+    if not width or not fitting:
+        return product.get("image")
+    return min(fitting, key=lambda v: v["width"])["url"]
+
+
+class ImageUploader:
+    """Uploads a product image together with its resized variants.
+
+    The upload stream is read once by Pillow for decoding and once by S3
+    for the original; variants are resized and uploaded in a thread pool
+    concurrently with the original.
+
+    presign() and finalize() are the direct-to-S3 flow: the browser posts
+    the file to S3 itself and the app only checks the stored object.
+    """
+
+    def __init__(self, s3, bucket, region, widths=IMAGE_VARIANT_WIDTHS, max_workers=8,
+                 max_bytes=UPLOAD_MAX_BYTES, upload_ttl=UPLOAD_URL_TTL):
+        self.s3 = s3
+        self.bucket = bucket
+        self.region = region
+        self.widths = widths
+        self.max_bytes = max_bytes
+        self.upload_ttl = upload_ttl
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-upload")
+
+    def url_for(self, key):
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def owns_url(self, url):
+        """Whether `url` points at an object in this uploader's bucket."""
+        parsed = urlparse(url or "")
+        return parsed.scheme == "https" and parsed.netloc == urlparse(self.url_for("")).netloc
+
+    def _upload_original(self, stream, key, content_type):
+        self.s3.upload_fileobj(stream, self.bucket, key, ExtraArgs={"ContentType": content_type})
+
+    def _upload_variant(self, image, width, key):
+        variant = image.copy()
+        variant.thumbnail((width, width * 4))
+        if variant.mode not in ("RGB", "RGBA"):
+            variant = variant.convert("RGBA" if "A" in variant.getbands() else "RGB")
+
+        out = io.BytesIO()
+        variant.save(out, format="WEBP", quality=80, method=4)
+        out.seek(0)
+        self.s3.upload_fileobj(out, self.bucket, key, ExtraArgs={
+            "ContentType": "image/webp",
+            "CacheControl": "public, max-age=31536000, immutable",
+        })
+        return {"key": key, "url": self.url_for(key), "width": variant.width}
+
+    def upload(self, stream, filename, content_type):
+        """Upload an image file, returns the fields to store on the product.
+
+        Raises InvalidImage when the file can't be decoded.
+        """
+        from PIL import Image, ImageOps
+
+        try:
+            image = Image.open(stream)
+            image.load()
+        except Exception as e:
+            raise InvalidImage(str(e)) from e
+        stream.seek(0)
+        # WebP variants drop EXIF, bake the orientation into their pixels
+        image = ImageOps.exif_transpose(image)
+
+        base = f"products/{uuid.uuid4()}"
+        original_key = f"{base}_{filename}"
+
+        original = self.pool.submit(self._upload_original, stream, original_key, content_type)
+        variants = {}
+        try:
+            variants = self._upload_variants(image, base)
+            original.result()
+        except Exception:
+            # the original may still be in flight when a variant fails
+            wait([original])
+            uploaded = [original_key] + [v["key"] for v in variants.values()]
+            delete_s3_objects(self.s3, self.bucket, uploaded)
+            raise
+
+        return {
+            "image": self.url_for(original_key),
+            "s3_key": original_key,
+            "image_width": image.width,
+            "image_variants": variants,
+        }
+
+    def _upload_variants(self, image, base):
+        """Upload every variant narrower than `image`, all or none."""
+        futures = {
+            str(width): self.pool.submit(self._upload_variant, image, width, f"{base}_w{width}.webp")
+            for width in self.widths if width < image.width
+        }
+
+        results = {}
+        error = None
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                error = error or e
+
+        if error:
+            delete_s3_objects(self.s3, self.bucket, [v["key"] for v in results.values()])
+            raise error
+        return results
+
+    def build_variants(self, key):
+        """Variants for an object uploaded with presign(), returns the fields to store.
+
+        Raises InvalidImage when the object can't be decoded; S3 errors
+        propagate.
+        """
+        from PIL import Image, ImageOps
+
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read(self.max_bytes + 1)
+        if len(body) > self.max_bytes:
+            raise InvalidImage(f"image must be at most {self.max_bytes} bytes")
+        try:
+            image = Image.open(io.BytesIO(body))
+            image.load()
+        except Exception as e:
+            raise InvalidImage(str(e)) from e
+        image = ImageOps.exif_transpose(image)
+
+        # presign() keys are products/<uuid>_<filename>, variants sit next to them
+        base = key.split("_", 1)[0]
+        return {
+            "image_width": image.width,
+            "image_variants": self._upload_variants(image, base),
+        }
+
+    def presign(self, filename, content_type, size=None):
+        """Presigned POST for uploading an image straight to S3.
+
+        Returns {"key", "url", "fields"}: the browser posts `fields` and
+        then the file to `url`. S3 itself enforces the content type and
+        size limit. Raises InvalidImage when the declared type or size is
+        already out of bounds.
+        """
+        if content_type not in UPLOAD_CONTENT_TYPES:
+            raise InvalidImage(f"unsupported content type {content_type!r}")
+        if size is not None and not 0 < size <= self.max_bytes:
+            raise InvalidImage(f"image must be at most {self.max_bytes} bytes")
+
+        key = f"products/{uuid.uuid4()}_{filename}"
+        post = self.s3.generate_presigned_post(
+            self.bucket,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, self.max_bytes],
+            ],
+            ExpiresIn=self.upload_ttl,
+        )
+        return {"key": key, "url": post["url"], "fields": post["fields"]}
+
+    def finalize(self, key):
+        """Check a presigned upload with one head_object, returns the fields to store.
+
+        Raises InvalidImage when the object is missing or breaks the limits;
+        other S3 errors propagate.
+        """
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise InvalidImage("image has not been uploaded") from e
+            raise
+
+        if head.get("ContentType") not in UPLOAD_CONTENT_TYPES:
+            raise InvalidImage(f"unsupported content type {head.get('ContentType')!r}")
+        if not 0 < head.get("ContentLength", 0) <= self.max_bytes:
+            raise InvalidImage(f"image must be at most {self.max_bytes} bytes")
+
+        return {
+            "image": self.url_for(key),
+            "s3_key": key,
+            "image_variants": {},
+            # picked up by build_variants() in a background job
+            **VARIANTS_PENDING,
+        }
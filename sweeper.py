@@ -0,0 +1,332 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+from storage import delete_s3_objects, product_image_keys
+
+# oldest deadline first, served by the expires_at index
+EXPIRY_SORT = [("expires_at", 1)]
+
+
+def expired_query(now):
+    """Products whose expires_at is at or before `now`."""
+    return {"expires_at": {"$lte": now}}
+
+
+class ExpirySweeper:
+    """Removes expired products and their S3 images in bounded batches."""
+
+    def __init__(self, products, s3, bucket, batch_size=500, max_batches=50, on_deleted=None):
+        self.products = products
+        self.s3 = s3
+        self.bucket = bucket
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        # called with the _ids of every deleted batch, e.g. to drop cache entries
+        self.on_deleted = on_deleted
+        self.last_stats = None
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports this module for its queries
+            from indexes import create_indexes
+
+            create_indexes(self.products, "products")
+            self._index_ready = True
+
+    def lag(self, now=None):
+        """Seconds the oldest still-present expired product is overdue, 0 if none."""
+        now = now or datetime.utcnow()
+        oldest = self.products.find_one(
+            expired_query(now), {"_id": 0, "expires_at": 1}, sort=EXPIRY_SORT
+        )
+        if not oldest:
+            return 0
+        return (now - oldest["expires_at"]).total_seconds()
+
+    def sweep(self, now=None):
+        self.ensure_indexes()
+
+        started = time.monotonic()
+        now = now or datetime.utcnow()
+        stats = {
+            "batches": 0,
+            "scanned": 0,
+            "deleted": 0,
+            "s3_deleted": 0,
+            "s3_errors": 0,
+            "oldest_expired_at": None,
+        }
+        # documents whose image could not be removed stay in Mongo for the
+        # next sweep, skip them here so one bad key can't stall the loop
+        failed_ids = []
+
+        while stats["batches"] < self.max_batches:
+            query = expired_query(now)
+            if failed_ids:
+                query["_id"] = {"$nin": failed_ids}
+
+            batch = list(
+                self.products.find(
+                    query,
+                    {"_id": 1, "s3_key": 1, "image": 1, "image_variants": 1, "pending_image": 1,
+                     "expires_at": 1}
+                )
+                .sort(EXPIRY_SORT)
+                .limit(self.batch_size)
+            )
+            if not batch:
+                break
+
+            stats["batches"] += 1
+            stats["scanned"] += len(batch)
+            if stats["oldest_expired_at"] is None:
+                stats["oldest_expired_at"] = batch[0].get("expires_at")
+
+            keys = [key for item in batch for key in product_image_keys(item)]
+            deleted_keys, errors = delete_s3_objects(self.s3, self.bucket, keys)
+            stats["s3_deleted"] += len(deleted_keys)
+            stats["s3_errors"] += len(errors)
+
+            for key, message in errors.items():
+                print(f"❌ S3 delete failed for {key}: {message}")
+
+            done_ids = []
+            for item in batch:
+                if any(key in errors for key in product_image_keys(item)):
+                    failed_ids.append(item["_id"])
+                else:
+                    done_ids.append(item["_id"])
+
+            if done_ids:
+                result = self.products.delete_many({"_id": {"$in": done_ids}})
+                stats["deleted"] += result.deleted_count
+                if self.on_deleted:
+                    self.on_deleted(done_ids)
+
+            if len(batch) < self.batch_size:
+                break
+
+        stats["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        self.last_stats = stats
+        return stats
+
+
+# change stream events that can move a product's deadline; stats updates
+# ($inc on every payment) are filtered out on the server
+EXPIRY_EVENTS = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace", "delete"]}},
+        {"updateDescription.updatedFields.expires_at": {"$exists": True}},
+    ]}},
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "fullDocument.expires_at": 1,
+        "updateDescription.updatedFields.expires_at": 1,
+    }},
+]
+
+
+class ExpiryScheduler:
+    """Runs the sweeper when the next product expires instead of on a timer.
+
+    Deadlines are kept in a min-heap, seeded with those within `horizon`
+    seconds from an indexed range query on expires_at and kept current by
+    schedule() (called from create_product) and a change stream on
+    products. schedule() takes any deadline, so listings created between
+    seeds are in the heap from the start; the next seed drops the ones
+    past its horizon until a later seed reaches them. The thread sleeps
+    until the earliest deadline, so an idle platform costs one query per
+    horizon. Without change streams it re-seeds every `reload_interval`
+    seconds instead.
+
+    Every process keeps its own heap; `lease` decides which one sweeps.
+    Deadlines a process isn't the leader for are dropped, the periodic
+    sweep job covers them if the leader goes away.
+    """
+
+    def __init__(self, sweeper, products, lease=None, horizon=3600, reload_interval=60,
+                 retry_interval=30, min_interval=1.0):
+        self.sweeper = sweeper
+        self.products = products
+        self.lease = lease
+        self.horizon = horizon
+        self.reload_interval = reload_interval
+        self.retry_interval = retry_interval
+        # expiries closer together than this are swept together
+        self.min_interval = min_interval
+
+        self._heap = []
+        self._deadlines = {}
+        self._horizon_end = None
+        self._retry_at = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.mode = "idle"
+        self.sweeps = 0
+        self.last_sweep_at = None
+
+    # ---------- deadlines ----------
+    def schedule(self, product_id, expires_at):
+        with self._cond:
+            if self._horizon_end is None:
+                # not seeded yet, the first seed picks it up
+                return
+            self._deadlines[product_id] = expires_at
+            heapq.heappush(self._heap, (expires_at, product_id))
+            if self._heap[0][1] == product_id:
+                self._cond.notify()
+
+    def forget(self, product_id):
+        with self._cond:
+            self._deadlines.pop(product_id, None)
+
+    def seed(self, now=None):
+        now = now or datetime.utcnow()
+        horizon_end = now + timedelta(seconds=self.horizon)
+        docs = list(self.products.find(
+            expired_query(horizon_end), {"_id": 1, "expires_at": 1}
+        ).sort(EXPIRY_SORT))
+
+        with self._cond:
+            self._deadlines = {doc["_id"]: doc["expires_at"] for doc in docs}
+            self._heap = [(exp, pid) for pid, exp in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self._horizon_end = horizon_end
+            self._cond.notify()
+
+    def next_deadline(self):
+        """Earliest live deadline, discarding heap entries that went stale."""
+        with self._cond:
+            while self._heap:
+                expires_at, product_id = self._heap[0]
+                if self._deadlines.get(product_id) == expires_at:
+                    return expires_at
+                heapq.heappop(self._heap)
+            return None
+
+    def pop_due(self, now):
+        due = 0
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, product_id = heapq.heappop(self._heap)
+                if self._deadlines.get(product_id) == expires_at:
+                    del self._deadlines[product_id]
+                    due += 1
+        return due
+
+    # ---------- change stream ----------
+    def _apply_change(self, change):
+        op = change.get("operationType")
+        product_id = (change.get("documentKey") or {}).get("_id")
+        if op == "delete":
+            self.forget(product_id)
+            return
+
+        if op == "update":
+            expires_at = change["updateDescription"]["updatedFields"].get("expires_at")
+        else:
+            expires_at = (change.get("fullDocument") or {}).get("expires_at")
+
+        self.forget(product_id)
+        if isinstance(expires_at, datetime):
+            self.schedule(product_id, expires_at)
+
+    def _watch_forever(self):
+        while not self._stop.is_set():
+            try:
+                with self.products.watch(EXPIRY_EVENTS) as stream:
+                    # changes before the stream opened are covered by the seed
+                    self.seed()
+                    self.mode = "change_stream"
+                    for change in stream:
+                        self._apply_change(change)
+                        if self._stop.is_set():
+                            return
+            except Exception as e:
+                if self.mode != "polling":
+                    print(f"Expiry change stream unavailable, polling: {e}")
+                self.mode = "polling"
+                try:
+                    self.seed()
+                except Exception as seed_error:
+                    print(f"Expiry seed failed: {seed_error}")
+
+            self._stop.wait(self.reload_interval)
+
+    # ---------- sweeping ----------
+    def _wait_timeout(self, now):
+        wakes = [self._horizon_end, self._retry_at, self.next_deadline()]
+        wake = min(w for w in wakes if w is not None)
+        if self.last_sweep_at is not None:
+            wake = max(wake, self.last_sweep_at + timedelta(seconds=self.min_interval))
+        return max((wake - now).total_seconds(), 0)
+
+    def run_pending(self, now=None):
+        """Sweep if a deadline or retry is due, re-seed at the horizon."""
+        now = now or datetime.utcnow()
+        if self._horizon_end is None or now >= self._horizon_end:
+            self.seed(now)
+
+        retry = self._retry_at is not None and now >= self._retry_at
+        if not self.pop_due(now) and not retry:
+            return None
+        self._retry_at = None
+
+        if self.lease is not None and not self.lease.acquire():
+            return None
+
+        stats = self.sweeper.sweep(now)
+        self.sweeps += 1
+        self.last_sweep_at = now
+        if stats["s3_errors"]:
+            self._retry_at = now + timedelta(seconds=self.retry_interval)
+        return stats
+
+    def _run_forever(self):
+        while not self._stop.is_set():
+            try:
+                stats = self.run_pending()
+                if stats and stats["scanned"]:
+                    print(
+                        f"✅ Expiry: {stats['deleted']} deleted, "
+                        f"{stats['s3_errors']} S3 errors in {stats['duration_ms']} ms"
+                    )
+            except Exception as e:
+                print(f"Expiry scheduler error: {e}")
+                self._stop.wait(self.retry_interval)
+                continue
+
+            with self._cond:
+                if self._horizon_end is not None:
+                    self._cond.wait(self._wait_timeout(datetime.utcnow()))
+
+    def start(self):
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(target=self._watch_forever, name="expiry-watch", daemon=True),
+            threading.Thread(target=self._run_forever, name="expiry-run", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        deadline = self.next_deadline()
+        return {
+            "mode": self.mode,
+            "scheduled": len(self._deadlines),
+            "next_deadline": deadline.isoformat() if deadline else None,
+            "sweeps": self.sweeps,
+            "last_sweep_at": self.last_sweep_at.isoformat() if self.last_sweep_at else None,
+        }
@@ -0,0 +1,116 @@
+import unittest
+
+from indexes import INDEXES, check_query_plans, ensure_indexes, hot_queries
+from product_listing import ProductListing
+from product_transactions import TransactionStore
+from ratelimit import MongoBucketStore
+from receipt_queue import ReceiptQueue
+from sweeper import ExpirySweeper
+from tx_verifier import TransactionVerifier
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+def plan(stage, returned=1, examined=1):
+    return {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": stage}}},
+        "executionStats": {"nReturned": returned, "totalDocsExamined": examined},
+    }
+
+
+class FakeCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def limit(self, n):
+        return self
+
+    def sort(self, sort):
+        return self
+
+    def explain(self):
+        return self.plan
+
+
+class FakeDb:
+    """Answers every explain with a canned plan, chosen per collection."""
+
+    def __init__(self, plans):
+        self.plans = plans
+
+    def __getitem__(self, collection):
+        db = self
+
+        class Collection:
+            def find(self, filter):
+                return FakeCursor(db.plans.get(collection, plan("IXSCAN")))
+
+        return Collection()
+
+    def command(self, name, spec, verbosity=None):
+        return {"stages": [{"$cursor": self.plans.get(spec["aggregate"], plan("IXSCAN"))}]}
+
+
+class CheckQueryPlansTest(unittest.TestCase):
+    """check_query_plans against canned explain output.
+
+    tests/test_query_plans.py runs the real plans; point TEST_MONGO_URI at a
+    throwaway mongod (default mongodb://localhost:27017) to run it.
+    """
+
+    def test_index_backed_plans_pass(self):
+        self.assertEqual(check_query_plans(FakeDb({})), [])
+
+    def test_collscan_fails(self):
+        failures = check_query_plans(FakeDb({"receipt_jobs": plan("COLLSCAN")}))
+        names = [name for name, collection, _ in hot_queries() if collection == "receipt_jobs"]
+        self.assertEqual(failures, [(name, "COLLSCAN") for name in names])
+
+    def test_too_many_examined_fails(self):
+        failures = check_query_plans(FakeDb({"users": plan("IXSCAN", returned=1, examined=500)}))
+        self.assertEqual(failures, [("auth: user by wallet", "examined 500 docs for 1 returned")])
+
+    def test_every_hot_query_has_an_indexed_collection(self):
+        for name, collection, _ in hot_queries():
+            self.assertIn(collection, INDEXES, name)
+
+
+@unittest.skipIf(mongomock is None, "mongomock not installed")
+class IndexSourceTest(unittest.TestCase):
+    """The stores create their indexes from INDEXES and nothing else."""
+
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+
+    def index_keys(self, db):
+        return {
+            collection: sorted(
+                tuple(info["key"]) for name, info in db[collection].index_information().items()
+                if name != "_id_"
+            )
+            for collection in db.list_collection_names()
+        }
+
+    def test_stores_match_ensure_indexes(self):
+        db = self.db
+        ProductListing(db.products, None).ensure_indexes()
+        TransactionStore(db.transactions, db.products).ensure_indexes()
+        TransactionVerifier(db.transactions, db.products, rpc=None).ensure_indexes()
+        ReceiptQueue(db.receipt_jobs, handler=None).ensure_indexes()
+        ExpirySweeper(db.products, s3=None, bucket=None).ensure_indexes()
+        MongoBucketStore(db.rate_limits).ensure_indexes()
+        created = self.index_keys(db)
+
+        expected_db = mongomock.MongoClient().db
+        ensure_indexes(expected_db)
+        expected = self.index_keys(expected_db)
+
+        for collection, keys in created.items():
+            self.assertEqual(keys, expected[collection], collection)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from indexes import check_query_plans, ensure_indexes
+
+MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017")
+
+
+def connect():
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        return None
+    return client
+
+
+class QueryPlanTest(unittest.TestCase):
+    """Every hot query is index-backed on a real mongod (TEST_MONGO_URI)."""
+
+    def setUp(self):
+        self.client = connect()
+        if self.client is None:
+            self.skipTest(f"no mongod at {MONGO_URI}")
+        self.db = self.client[f"neonflick-test-{uuid.uuid4().hex[:8]}"]
+        self.addCleanup(self.client.close)
+        self.addCleanup(self.client.drop_database, self.db.name)
+
+        ensure_indexes(self.db)
+        self.seed()
+
+    def seed(self):
+        # enough other wallets' documents that a scan would show up in the ratio
+        now = datetime.utcnow()
+        wallets = ["w"] + [f"other-{i}" for i in range(20)]
+        products = [
+            {"_id": ObjectId(), "wallet": wallet, "title": "t", "price": 1.0,
+             "created_at": now - timedelta(minutes=i), "expires_at": now + timedelta(hours=i - 5)}
+            for wallet in wallets for i in range(30)
+        ]
+        self.db.products.insert_many(products)
+        self.db.transactions.insert_many([
+            {"hash": f"h-{p['_id']}", "product_id": p["_id"], "created_at": now,
+             "verification": "pending" if i % 3 else "confirmed",
+             "next_check_at": now + timedelta(minutes=i - 50)}
+            for i, p in enumerate(products)
+        ])
+        self.db.seller_stats.insert_many([
+            {"wallet": wallet, "day": datetime(now.year, now.month, now.day) - timedelta(days=d),
+             "currency": "SOL", "sales": 1, "gross": 1, "commission": 0}
+            for wallet in wallets for d in range(60)
+        ])
+        self.db.users.insert_many([{"wallet": wallet} for wallet in wallets])
+        self.db.blocked_users.insert_many([{"wallet": f"blocked-{i}"} for i in range(50)])
+        self.db.receipt_jobs.insert_many([
+            {"tx_hash": f"r-{i}", "status": ["queued", "retry", "processing", "sent"][i % 4],
+             "next_attempt_at": now + timedelta(minutes=i - 100),
+             "locked_until": now + timedelta(minutes=i - 100)}
+            for i in range(200)
+        ])
+
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual(check_query_plans(self.db), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+from product_transactions import new_transaction
+from tx_verifier import CONFIRMED, FAILED, PENDING, TransactionVerifier, check_transfers
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import solana_stub  # noqa: E402
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+SELLER = "Seller1111111111111111111111111111111111111"
+PLATFORM = "Platform111111111111111111111111111111111111"
+EXPECTED = [{"to": SELLER, "lamports": 95_000}, {"to": PLATFORM, "lamports": 5_000}]
+
+
+class StubRPC:
+    """The stub node called in-process, in place of SolanaRPC."""
+
+    def __init__(self, stub):
+        self.stub = stub
+
+    def call(self, method, params):
+        return getattr(self.stub, method)(params)
+
+
+class CheckTransfersTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = solana_stub.SolanaStub()
+
+    def transaction(self, transfers, err=None):
+        self.stub.add("sig", transfers, err=err)
+        return self.stub.getTransaction(["sig"])
+
+    def test_exact_payment_passes(self):
+        self.assertIsNone(check_transfers(self.transaction(EXPECTED), EXPECTED))
+
+    def test_split_payment_is_summed(self):
+        transfers = [{"to": SELLER, "lamports": 50_000}, {"to": SELLER, "lamports": 45_000},
+                     {"to": PLATFORM, "lamports": 5_000}]
+        self.assertIsNone(check_transfers(self.transaction(transfers), EXPECTED))
+
+    def test_underpaid(self):
+        transfers = [{"to": SELLER, "lamports": 94_999}, {"to": PLATFORM, "lamports": 5_000}]
+        self.assertEqual(check_transfers(self.transaction(transfers), EXPECTED),
+                         f"{SELLER} received 94999 of 95000 lamports")
+
+    def test_wrong_recipient(self):
+        transfers = [{"to": "Someone", "lamports": 95_000}, {"to": PLATFORM, "lamports": 5_000}]
+        self.assertEqual(check_transfers(self.transaction(transfers), EXPECTED),
+                         f"{SELLER} received 0 of 95000 lamports")
+
+    def test_failed_on_chain(self):
+        transaction = self.transaction(EXPECTED, err={"InstructionError": [0, "Custom"]})
+        self.assertEqual(check_transfers(transaction, EXPECTED), "transaction failed on chain")
+
+
+@unittest.skipIf(mongomock is None, "mongomock not installed")
+class RunOnceTest(unittest.TestCase):
+    """TransactionVerifier.run_once against the Solana stub and mongomock."""
+
+    def setUp(self):
+        db = mongomock.MongoClient().db
+        self.transactions = db.transactions
+        self.products = db.products
+        self.stub = solana_stub.SolanaStub()
+        self.verifier = TransactionVerifier(
+            self.transactions, self.products, StubRPC(self.stub),
+            retry_interval=15, not_found_after=timedelta(minutes=10),
+        )
+        self.addCleanup(self.verifier.pool.shutdown)
+        # Mongo keeps milliseconds only
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+    def record(self, tx_hash, created_at=None):
+        product_id = self.products.insert_one({"stats": {"count": 1}}).inserted_id
+        doc = new_transaction(
+            product_id, tx_hash, True, verification=PENDING,
+            next_check_at=self.now, expected_transfers=EXPECTED,
+        )
+        if created_at:
+            doc["created_at"] = created_at
+        self.transactions.insert_one(doc)
+        return product_id
+
+    def verification(self, tx_hash):
+        return self.transactions.find_one({"hash": tx_hash})
+
+    def confirmed_count(self, product_id):
+        return self.products.find_one({"_id": product_id}).get("stats", {}).get("confirmed_count", 0)
+
+    def test_confirmed(self):
+        product_id = self.record("paid")
+        self.stub.add("paid", EXPECTED)
+
+        stats = self.verifier.run_once(self.now)
+
+        self.assertEqual(stats, {"checked": 1, "confirmed": 1, "failed": 0, "pending": 0})
+        tx = self.verification("paid")
+        self.assertEqual(tx["verification"], CONFIRMED)
+        self.assertNotIn("next_check_at", tx)
+        self.assertEqual(self.confirmed_count(product_id), 1)
+
+        # a second run finds nothing due and counts nothing twice
+        self.assertEqual(self.verifier.run_once(self.now)["checked"], 0)
+        self.assertEqual(self.confirmed_count(product_id), 1)
+
+    def test_failed_on_chain(self):
+        product_id = self.record("reverted")
+        self.stub.add("reverted", EXPECTED, err={"InstructionError": [0, "Custom"]})
+
+        stats = self.verifier.run_once(self.now)
+
+        self.assertEqual(stats["failed"], 1)
+        tx = self.verification("reverted")
+        self.assertEqual(tx["verification"], FAILED)
+        self.assertEqual(tx["verification_error"], "transaction failed on chain")
+        self.assertEqual(self.confirmed_count(product_id), 0)
+
+    def test_not_found_then_expired(self):
+        self.record("missing", created_at=self.now)
+
+        stats = self.verifier.run_once(self.now)
+        self.assertEqual(stats["pending"], 1)
+        tx = self.verification("missing")
+        self.assertEqual(tx["verification"], PENDING)
+        self.assertEqual(tx["next_check_at"], self.now + timedelta(seconds=15))
+        self.assertEqual(tx["verification_attempts"], 1)
+
+        later = self.now + timedelta(minutes=11)
+        stats = self.verifier.run_once(later)
+        self.assertEqual(stats["failed"], 1)
+        tx = self.verification("missing")
+        self.assertEqual(tx["verification"], FAILED)
+        self.assertEqual(tx["verification_error"], "signature not found")
+
+    def test_underpaid_is_not_verified(self):
+        product_id = self.record("short")
+        self.stub.add("short", [{"to": SELLER, "lamports": 1}, {"to": PLATFORM, "lamports": 5_000}])
+
+        self.verifier.run_once(self.now)
+
+        tx = self.verification("short")
+        self.assertEqual(tx["verification"], FAILED)
+        self.assertEqual(tx["verification_error"], f"{SELLER} received 1 of 95000 lamports")
+        self.assertEqual(self.confirmed_count(product_id), 0)
+
+    def test_wrong_recipient_is_not_verified(self):
+        product_id = self.record("elsewhere")
+        self.stub.add("elsewhere", [{"to": "Someone", "lamports": 100_000}])
+
+        self.verifier.run_once(self.now)
+
+        tx = self.verification("elsewhere")
+        self.assertEqual(tx["verification"], FAILED)
+        self.assertIn(SELLER, tx["verification_error"])
+        self.assertEqual(self.confirmed_count(product_id), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING
+
+import metrics
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+# getSignatureStatuses accepts at most 256 signatures per call
+STATUS_BATCH = 256
+
+DUE_SORT = [("next_check_at", ASCENDING)]
+
+
+def due_query(now):
+    """Pending transactions whose next check is at or before `now`."""
+    return {"verification": PENDING, "next_check_at": {"$lte": now}}
+
+verifications = metrics.REGISTRY.counter(
+    "tx_verifications_total", "Recorded transactions verified on chain", ("result",)
+)
+
+
+def paid_lamports(transaction):
+    """Sum of system-program transfers per destination in a jsonParsed tx."""
+    message = transaction["transaction"]["message"]
+    instructions = list(message.get("instructions", []))
+    for inner in (transaction.get("meta") or {}).get("innerInstructions") or []:
+        instructions.extend(inner.get("instructions", []))
+
+    paid = defaultdict(int)
+    for ix in instructions:
+        parsed = ix.get("parsed")
+        if ix.get("program") != "system" or not isinstance(parsed, dict):
+            continue
+        if parsed.get("type") in ("transfer", "transferWithSeed"):
+            info = parsed["info"]
+            paid[info["destination"]] += int(info["lamports"])
+    return paid
+
+
+def check_transfers(transaction, expected):
+    """None when every expected transfer is covered, else the reason it isn't."""
+    if (transaction.get("meta") or {}).get("err") is not None:
+        return "transaction failed on chain"
+
+    paid = paid_lamports(transaction)
+    for transfer in expected:
+        got = paid.get(transfer["to"], 0)
+        if got < transfer["lamports"]:
+            return f"{transfer['to']} received {got} of {transfer['lamports']} lamports"
+    return None
+
+
+class TransactionVerifier:
+    """Checks recorded transactions against the chain in the background.
+
+    Transactions are stored with verification "pending" and the transfers
+    prepare handed out. Each run looks up a batch of pending signatures
+    with getSignatureStatuses, fetches the confirmed ones with getTransaction
+    on a small thread pool and marks them confirmed (bumping the product's
+    stats.confirmed_count) or failed. Signatures the node has never seen
+    are retried until `not_found_after` has passed.
+
+    `rpc` is anything with call(method, params), so a local stub node or
+    solana-test-validator can stand in for the cluster.
+    """
+
+    def __init__(self, transactions, products, rpc, batch_size=200, concurrency=8,
+                 retry_interval=15, not_found_after=timedelta(minutes=10)):
+        self.transactions = transactions
+        self.products = products
+        self.rpc = rpc
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.not_found_after = not_found_after
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tx-verify")
+        self.last_stats = None
+        self._index_ready = False
+
+    def ensure_indexes(self):
+        if not self._index_ready:
+            # indexes imports this module for its queries
+            from indexes import create_indexes
+
+            create_indexes(self.transactions, "transactions")
+            self._index_ready = True
+
+    def due(self, now):
+        return list(
+            self.transactions.find(
+                due_query(now),
+                {"_id": 1, "hash": 1, "product_id": 1, "expected_transfers": 1, "created_at": 1}
+            )
+            .sort(DUE_SORT)
+            .limit(self.batch_size)
+        )
+
+    def signature_statuses(self, hashes):
+        statuses = {}
+        for start in range(0, len(hashes), STATUS_BATCH):
+            chunk = hashes[start:start + STATUS_BATCH]
+            result = self.rpc.call(
+                "getSignatureStatuses", [chunk, {"searchTransactionHistory": True}]
+            )
+            statuses.update(zip(chunk, result["value"]))
+        return statuses
+
+    def fetch_transaction(self, tx_hash):
+        return self.rpc.call("getTransaction", [tx_hash, {
+            "encoding": "jsonParsed",
+            "commitment": "confirmed",
+            "maxSupportedTransactionVersion": 0,
+        }])
+
+    def run_once(self, now=None):
+        self.ensure_indexes()
+        now = now or datetime.utcnow()
+        stats = {"checked": 0, "confirmed": 0, "failed": 0, "pending": 0}
+
+        batch = self.due(now)
+        if not batch:
+            self.last_stats = stats
+            return stats
+
+        statuses = self.signature_statuses([tx["hash"] for tx in batch])
+        stats["checked"] = len(batch)
+
+        landed = []
+        for tx in batch:
+            status = statuses.get(tx["hash"])
+            if status is None:
+                if now - tx.get("created_at", now) > self.not_found_after:
+                    self.finish(tx, FAILED, "signature not found", stats)
+                else:
+                    self.retry_later(tx, now, stats)
+            elif status.get("err") is not None:
+                self.finish(tx, FAILED, "transaction failed on chain", stats)
+            elif status.get("confirmationStatus") in ("confirmed", "finalized"):
+                landed.append(tx)
+            else:
+                self.retry_later(tx, now, stats)
+
+        fetched = self.pool.map(lambda tx: self._fetch(tx["hash"]), landed)
+        for tx, (transaction, error) in zip(landed, fetched):
+            if error is not None or transaction is None:
+                # status said confirmed but the node can't serve it yet
+                self.retry_later(tx, now, stats)
+                continue
+            reason = check_transfers(transaction, tx.get("expected_transfers") or [])
+            self.finish(tx, FAILED if reason else CONFIRMED, reason, stats)
+
+        self.last_stats = stats
+        return stats
+
+    def _fetch(self, tx_hash):
+        try:
+            return self.fetch_transaction(tx_hash), None
+        except Exception as e:
+            print(f"getTransaction {tx_hash} failed: {e}")
+            return None, e
+
+    def retry_later(self, tx, now, stats):
+        self.transactions.update_one(
+            {"_id": tx["_id"], "verification": PENDING},
+            {
+                "$set": {"next_check_at": now + timedelta(seconds=self.retry_interval)},
+                "$inc": {"verification_attempts": 1},
+            }
+        )
+        stats["pending"] += 1
+
+    def finish(self, tx, result, reason, stats):
+        update = {"verification": result, "verified_at": datetime.utcnow()}
+        if reason:
+            update["verification_error"] = reason
+
+        # only the run that flips it from pending counts it on the product
+        flipped = self.transactions.update_one(
+            {"_id": tx["_id"], "verification": PENDING},
+            {"$set": update, "$unset": {"next_check_at": ""}}
+        ).modified_count
+        if not flipped:
+            return
+
+        if result == CONFIRMED:
+            self.products.update_one(
+                {"_id": tx["product_id"]}, {"$inc": {"stats.confirmed_count": 1}}
+            )
+        stats[result] += 1
+        verifications.inc(result=result)